@@ -0,0 +1,199 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import clean_data
+import plotting
+import util.env
+from util import loader
+from benchmarks import synthetic
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
+RESULTS_PATH = os.path.join(BENCHMARK_DIR, "results.json")
+
+# run in this order: the plots read what the cleaning steps wrote
+BENCHMARKS = {
+    "process_fig4_data": clean_data.process_fig4_data,
+    "process_fig8_data": clean_data.process_fig8_data,
+    "process_fig9_data": clean_data.process_fig9_data,
+    "process_qcor_prtf_data": clean_data.process_qcor_prtf_data,
+    # N-MHSS years load in this process (workers=1): tracemalloc does not see
+    # worker processes, so the pool would hide the loaders' memory
+    "get_nmhss_container": lambda: clean_data.get_nmhss_container(use_cache=False, workers=1),
+    # builds the Feather cache the next benchmark reads from
+    "convert_nmhss_to_feather": lambda: clean_data.convert_nmhss_to_feather(workers=1),
+    "get_nmhss_container_cached": lambda: clean_data.get_nmhss_container(workers=1),
+    **{
+        f"plot_{name}": (lambda func: lambda: func(save=True))(func)
+        for name, func in plotting.FIGURES.items()
+    },
+}
+
+
+def run_benchmarks(scales=(1, 10, 100), names=None, repeat: int = 1) -> list:
+    """
+    Time and memory-profile each benchmark against synthetic inputs at each
+    scale.
+
+    Wall time is the best of repeat untraced runs; peak memory comes from a
+    separate run under tracemalloc so tracing does not skew the timings.
+
+    Returns a list of result dicts (name, scale, seconds, peak_mb, error).
+    """
+    names = list(BENCHMARKS) if names is None else names
+    results = []
+
+    for scale in scales:
+        with tempfile.TemporaryDirectory(prefix=f"youth-prtf-bench-{scale}x-") as root:
+            synthetic.generate(root, scale=scale)
+            util.env.configure(data=os.path.join(root, "data"), repo=os.path.join(root, "repo"))
+
+            for name in names:
+                result = _measure(BENCHMARKS[name], repeat)
+                result.update(name=name, scale=scale)
+                results.append(result)
+                _print_result(result)
+
+    return results
+
+
+def compare(results: list, baseline: list, tolerance: float = 0.25, floor: float = 0.05) -> list:
+    """
+    Benchmarks that got slower than baseline by more than tolerance (a
+    fraction) and by more than floor seconds, or that used more than
+    tolerance extra peak memory.
+    """
+    previous = {(result["name"], result["scale"]): result for result in baseline}
+    regressions = []
+
+    for result in results:
+        base = previous.get((result["name"], result["scale"]))
+        if base is None or result["error"] or base["error"]:
+            continue
+
+        slower = result["seconds"] - base["seconds"]
+        if slower > floor and result["seconds"] > base["seconds"] * (1 + tolerance):
+            regressions.append(
+                f"{result['name']} @ {result['scale']}x: "
+                f"{base['seconds']:.3f}s -> {result['seconds']:.3f}s"
+            )
+        if result["peak_mb"] > base["peak_mb"] * (1 + tolerance) + 1:
+            regressions.append(
+                f"{result['name']} @ {result['scale']}x: "
+                f"{base['peak_mb']:.1f} MB -> {result['peak_mb']:.1f} MB peak"
+            )
+
+    return regressions
+
+
+def write_results(results: list, path: str):
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "machine": platform.platform(),
+                "results": results,
+            },
+            f,
+            indent=1,
+        )
+
+
+def read_results(path: str) -> list:
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def _measure(func, repeat: int) -> dict:
+    result = {"seconds": None, "peak_mb": None, "error": None}
+    try:
+        timings = []
+        for _ in range(repeat):
+            # every run parses its inputs: the shared loader cache would
+            # otherwise serve the repeats and the traced run
+            loader.clear()
+            start = time.perf_counter()
+            _quietly(func)
+            timings.append(time.perf_counter() - start)
+            plotting.plt.close("all")
+
+        loader.clear()
+        tracemalloc.start()
+        try:
+            _quietly(func)
+            result["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+            plotting.plt.close("all")
+    except Exception as exc:
+        result["error"] = f"{type(exc).__name__}: {exc}"
+        return result
+
+    result["seconds"] = min(timings)
+
+    return result
+
+
+def _quietly(func):
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+
+
+def _print_result(result: dict):
+    label = f"{result['name']} @ {result['scale']}x"
+    if result["error"]:
+        print(f"{label:45} failed: {result['error']}")
+    else:
+        print(f"{label:45} {result['seconds']:8.3f}s {result['peak_mb']:9.1f} MB peak")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark clean_data.py and plotting.py on synthetic inputs.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per benchmark (best is kept)")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.scales, args.only, args.repeat)
+    write_results(results, args.output)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        write_results(results, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; rerun with --save-baseline to create one")
+        return 0
+
+    regressions = compare(results, read_results(args.baseline), args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print("No regressions against baseline")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
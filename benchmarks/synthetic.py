@@ -0,0 +1,165 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+STATES = [
+    ("Alabama", 1, "AL"), ("Alaska", 2, "AK"), ("Arizona", 4, "AZ"), ("Arkansas", 5, "AR"),
+    ("California", 6, "CA"), ("Colorado", 8, "CO"), ("Connecticut", 9, "CT"), ("Delaware", 10, "DE"),
+    ("District of Columbia", 11, "DC"), ("Florida", 12, "FL"), ("Georgia", 13, "GA"), ("Hawaii", 15, "HI"),
+    ("Idaho", 16, "ID"), ("Illinois", 17, "IL"), ("Indiana", 18, "IN"), ("Iowa", 19, "IA"),
+    ("Kansas", 20, "KS"), ("Kentucky", 21, "KY"), ("Louisiana", 22, "LA"), ("Maine", 23, "ME"),
+    ("Maryland", 24, "MD"), ("Massachusetts", 25, "MA"), ("Michigan", 26, "MI"), ("Minnesota", 27, "MN"),
+    ("Mississippi", 28, "MS"), ("Missouri", 29, "MO"), ("Montana", 30, "MT"), ("Nebraska", 31, "NE"),
+    ("Nevada", 32, "NV"), ("New Hampshire", 33, "NH"), ("New Jersey", 34, "NJ"), ("New Mexico", 35, "NM"),
+    ("New York", 36, "NY"), ("North Carolina", 37, "NC"), ("North Dakota", 38, "ND"), ("Ohio", 39, "OH"),
+    ("Oklahoma", 40, "OK"), ("Oregon", 41, "OR"), ("Pennsylvania", 42, "PA"), ("Rhode Island", 44, "RI"),
+    ("South Carolina", 45, "SC"), ("South Dakota", 46, "SD"), ("Tennessee", 47, "TN"), ("Texas", 48, "TX"),
+    ("Utah", 49, "UT"), ("Vermont", 50, "VT"), ("Virginia", 51, "VA"), ("Washington", 53, "WA"),
+    ("West Virginia", 54, "WV"), ("Wisconsin", 55, "WI"), ("Wyoming", 56, "WY"),
+]
+
+WISQARS_YEARS = range(2001, 2022)
+QCOR_YEARS = range(2010, 2024)
+NMHSS_YEARS = (2010, 2012, 2014, 2015, 2016, 2017, 2018, 2019, 2020, 2021, 2022)
+
+# rows per file at scale 1
+WISQARS_ROWS = 2_000
+NMHSS_FACILITIES = 1_000
+NMHSS_QUESTIONS = 60
+
+
+def generate(root: str, scale: int = 1, seed: int = 0):
+    """
+    Write synthetic inputs shaped like the real youth-rtc, WISQARS, QCOR and
+    N-MHSS files under root/data (the DATA_PATH layout), plus an empty repo
+    root with clean/ and out/ under root/repo.
+
+    Parameters:
+    - root: str, directory to write into
+    - scale: int, multiple of the real input sizes
+    - seed: int, random seed, so a scale always produces the same files
+    """
+    rng = np.random.default_rng(seed)
+
+    for path in ("youth-rtc", "WISQARS-data", os.path.join("qcor", "prtf"), os.path.join("NMHSS", "renamed")):
+        os.makedirs(os.path.join(root, "data", path), exist_ok=True)
+    for path in ("clean", "out"):
+        os.makedirs(os.path.join(root, "repo", path), exist_ok=True)
+
+    data = lambda *args: os.path.join(root, "data", *args)
+
+    write_fips(data("us-state-ansi-fips.csv"))
+    write_fig_inputs(data("youth-rtc"), scale, rng)
+    write_wisqars(data("WISQARS-data"), scale, rng)
+    write_qcor(data("qcor", "prtf"), scale, rng)
+    write_nmhss(data("NMHSS", "renamed"), scale, rng)
+
+    return None
+
+
+def write_fips(filepath: str):
+    pd.DataFrame(STATES, columns=["stname", " st", "stusps"]).to_csv(filepath, index=False)
+
+
+def write_fig_inputs(dir_path: str, scale: int, rng: np.random.Generator):
+    years = [str(year) for year in range(2010, 2025)]
+    names = [name for name, _, _ in STATES] + ["National"]
+    names += [f"{name} {copy}" for copy in range(1, scale) for name in names]
+    fig4 = pd.DataFrame(rng.integers(1, 40, (len(names), len(years))), columns=years)
+    fig4.insert(0, "year", names)
+    fig4.to_csv(os.path.join(dir_path, "fig4.csv"), index=False)
+
+    years = [str(year) for year in range(2010, 2024)]
+    keys = ["prft_total_def", "prtf_count", "sth_total_def", "sth_count"]
+    keys += [f"other_{i}" for i in range(4 * (scale - 1))]
+    fig9 = pd.DataFrame(rng.integers(300, 9000, (len(keys), len(years))), columns=years)
+    fig9 = fig9.map(lambda value: f"{value:,}")
+    fig9.insert(0, "year", keys)
+    fig9.to_csv(os.path.join(dir_path, "fig9.csv"), index=False)
+
+    years = [str(year) for year in range(2010, 2023)]
+    fig5 = pd.DataFrame([rng.integers(500, 850, len(years))], columns=years)
+    fig5.insert(0, "year", ["count"])
+    fig5.to_csv(os.path.join(dir_path, "fig5.csv"), index=False)
+
+    years = ["2010", "2014", "2016", "2018", "2020", "2021", "2022"]
+    figs6and7 = pd.DataFrame(
+        [[f"{value:,}" for value in rng.integers(20_000, 50_000, len(years))] for _ in range(2)],
+        index=["beds", "clients"],
+        columns=years,
+    )
+    figs6and7.to_csv(os.path.join(dir_path, "figs6and7.csv"))
+
+    years = range(1970, 1987)
+    fig11 = pd.DataFrame(
+        {
+            "Year": years,
+            "Total Psychiatric Inpatient & Residential Care": [
+                f"{value:,}" for value in rng.integers(250_000, 480_000, len(years))
+            ],
+        }
+    )
+    fig11.to_csv(os.path.join(dir_path, "fig11.csv"), index=False)
+
+    try:
+        fig3 = pd.DataFrame([rng.integers(340, 410, 14)], columns=list(range(2010, 2024)))
+        fig3.insert(0, "year", ["count"])
+        fig3.to_excel(os.path.join(dir_path, "fig3.xlsx"), index=False)
+    except ImportError:  # no Excel writer installed
+        pass
+
+
+def write_wisqars(dir_path: str, scale: int, rng: np.random.Generator):
+    rows = WISQARS_ROWS * scale
+    for year in WISQARS_YEARS:
+        pd.DataFrame(
+            {
+                "Cause Category": rng.choice(["Suicide", "Homicide", "Unintentional Injury", "Other"], rows),
+                "Sex": rng.choice(["Male", "Female"], rows),
+                "Race": rng.choice(["White", "Black", "Asian", "AI/AN", "Other"], rows),
+                "Age Group": rng.choice(["14", "15", "16", "17", "18"], rows),
+                "Deaths": rng.integers(0, 40, rows),
+                "Population": rng.integers(10_000, 500_000, rows),
+                "Crude Rate": rng.random(rows) * 20,
+            }
+        ).to_csv(os.path.join(dir_path, f"wisqars-lcd-{year}.csv"), index=False)
+
+
+def write_qcor(dir_path: str, scale: int, rng: np.random.Generator):
+    names = [name for name, _, _ in STATES]
+    names += [f"{name} {copy}" for copy in range(1, scale) for name in names]
+    columns = ["Selection Criteria"] + [f"Unnamed: {i}" for i in range(1, 8)]
+    for year in QCOR_YEARS:
+        counts = rng.integers(0, 60, (len(names), 4))
+        counts[:, [1, 3]] //= 20
+        body = [[name, *row, "", "", int(row.sum())] for name, row in zip(names, counts)]
+        total = counts.sum(axis=0)
+        rows = [
+            ["", "Standard Surveys", "", "Complaint Surveys", "", "", "", "Total"],
+            ["State", "Standard", "CoP", "Standard", "CoP", "", "", ""],
+            *body,
+            ["National Total", *total, "", "", int(total.sum())],
+        ]
+        pd.DataFrame(rows, columns=columns).to_csv(
+            os.path.join(dir_path, f"QCOR_PRTF_Deficiencies_{year}.csv"), index=False
+        )
+
+
+def write_nmhss(dir_path: str, scale: int, rng: np.random.Generator):
+    rows = NMHSS_FACILITIES * scale
+    for year in NMHSS_YEARS:
+        states = rng.integers(0, len(STATES), rows)
+        df = pd.DataFrame(
+            {
+                "CASEID": [f"{year}{i:06d}" for i in range(rows)] if year != 2010 else np.arange(rows),
+                "STFIPS": [STATES[i][1] for i in states],
+                "FACILITYTYPE": rng.integers(1, 10, rows),
+                "BEDS": rng.integers(0, 300, rows),
+            }
+        )
+        if year != 2010:
+            df["LST"] = [STATES[i][2] for i in states]
+        for question in range(NMHSS_QUESTIONS):
+            df[f"Q{question}"] = rng.choice([0, 1, -1, -2, -9], rows, p=[0.45, 0.45, 0.05, 0.03, 0.02])
+        df.to_csv(os.path.join(dir_path, f"{year}.csv"), index=False)
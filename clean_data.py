@@ -1,18 +1,41 @@
 import os
 import re
-import shutil
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import NamedTuple
 
+import numpy as np
 import pandas as pd
+from util.artifacts import write_csv
+from util.cache import function_hash
+from util.columnar import arrow_available, read_cached, read_feather, refresh_cache, write_feather
+from util.convert import tsv_to_csv
 from util.env import data_path, repo_path
+from util.instrument import count, instrumented
+from util.loader import read_frame
+from util.partition import Partition, PartitionedDataset
+from util.staging import stage_files
 
 
 def processed_data_path(*args):
     return repo_path("clean", *args)
 
 
-def process_fig4_data(df: pd.DataFrame = None):
+@instrumented
+def process_fig4_data(df: pd.DataFrame = None, wait: bool = True) -> pd.DataFrame:
+    """
+    Percent change in PRTF beds, 2010 to 2024, for the figure 4 states.
+
+    Parameters:
+    - df: fig4.csv frame, read when not given
+    - wait: write clean_fig4_data.csv before returning; otherwise it is
+      written in the background (see util.artifacts.wait_for_writes)
+
+    Returns the clean frame, as figure 4 reads it back from the CSV.
+    """
     if df is None:
-        df = pd.read_csv(data_path("youth-rtc", "fig4.csv"))
+        df = read_frame(data_path("youth-rtc", "fig4.csv"))
 
     df = df.rename(columns={"year": "state"})
 
@@ -36,43 +59,134 @@ def process_fig4_data(df: pd.DataFrame = None):
         "National",
     ]
 
-    processed_df = df[df["state"].isin(states_to_keep)]
+    processed_df = df[df["state"].isin(states_to_keep)].reset_index(drop=True)
 
-    processed_df.to_csv(processed_data_path("clean_fig4_data.csv"), index=False)
+    # figure 4 is drawn from this file next; hand it the frame being written
+    write_csv(processed_df, processed_data_path("clean_fig4_data.csv"), wait, cache=True, index=False)
+    count(rows_read=len(df), rows_written=len(processed_df))
     print(f"Fig 4 summary CSV file has been saved in {repo_path('clean')}")
 
-    return None
+    return processed_df
 
 
-def process_fig8_data():
-    year_counts = {}
+# WISQARS columns that deaths can be broken down by, keyed by short name
+WISQARS_DIMENSIONS = {"sex": "Sex", "race": "Race", "age_group": "Age Group"}
 
-    for filename in os.listdir(data_path("WISQARS-data")):
-        if any(str(year) in filename for year in range(2001, 2025)):
-            year = filename.split("-")[-1].split(".")[0]
 
-            df = pd.read_csv(os.path.join(data_path("WISQARS-data"), filename))
+@instrumented
+def process_fig8_data(workers: int = None, wait: bool = True) -> pd.DataFrame:
+    """
+    Yearly youth suicide counts from the WISQARS exports, with integer Year
+    and Count columns.
 
-            suicide_df = df[df["Cause Category"] == "Suicide"]
+    Parameters:
+    - workers: number of reader threads, see aggregate_wisqars_deaths
+    - wait: write clean_fig8_data.csv before returning; otherwise it is
+      written in the background
+    """
+    summary_df = aggregate_wisqars_deaths(workers=workers)
+    summary_df = summary_df.rename(columns={"year": "Year", "deaths": "Count"})
 
-            total_deaths = suicide_df["Deaths"].sum()
+    write_csv(summary_df, repo_path("clean", "clean_fig8_data.csv"), wait, index=False)
+    count(rows_written=len(summary_df))
 
-            year_counts[year] = total_deaths
+    print(f"Fig 8 summary CSV file has been saved in {repo_path('clean')}")
 
-    summary_df = pd.DataFrame(list(year_counts.items()), columns=["Year", "Count"])
+    return summary_df
 
-    summary_df.to_csv(repo_path("clean", "clean_fig8_data.csv"), index=False)
 
-    print(f"Fig 8 summary CSV file has been saved in {repo_path('clean')}")
+@instrumented
+def aggregate_wisqars_deaths(
+    cause: str = "Suicide", by=(), years=range(2001, 2025), workers: int = None
+) -> pd.DataFrame:
+    """
+    Sum WISQARS deaths for one cause category across the yearly exports.
 
-    return None
+    Each selected year's file is parsed on a worker thread, reading only the
+    columns needed and filtering on the cause chunk by chunk, so no full
+    frame is built; files of other years are not opened.
 
+    Parameters:
+    - cause: str, value of "Cause Category" to keep
+    - by: extra dimensions to break the totals down by, as keys of
+      WISQARS_DIMENSIONS (e.g. ("sex", "age_group")) or raw column names
+    - years: years to include
+    - workers: number of reader threads, defaults to one per file up to 8
+
+    Returns a frame with a year column, one column per dimension in by and
+    a deaths column.
+    """
+    dims = [WISQARS_DIMENSIONS.get(dim, dim) for dim in by]
+    yearly = PartitionedDataset("wisqars").read(
+        lambda partition: _sum_wisqars_file(partition.path, partition.year, cause, dims),
+        years=years,
+        workers=workers,
+    )
+    if not yearly:
+        return pd.DataFrame(columns=["year", *dims, "deaths"])
 
-def process_fig9_data():
+    frames = list(yearly.values())
+    count(rows_read=sum(frame.attrs["rows_read"] for frame in frames))
+    summary_df = pd.concat(frames, ignore_index=True)
+
+    return summary_df.rename(
+        columns={col: key for key, col in WISQARS_DIMENSIONS.items() if col in dims}
+    )
+
+
+def wisqars_files(years=range(2001, 2025)) -> dict:
+    """
+    Map year -> path of the WISQARS yearly exports, as recorded in the input
+    manifest, whose file name carries one of the requested years.
+    """
+    return {partition.year: partition.path for partition in PartitionedDataset("wisqars").select(years)}
+
+
+def _sum_wisqars_file(
+    filepath: str, year: int, cause: str, dims: list, chunksize: int = 200_000
+) -> pd.DataFrame:
+    partials = []
+    rows_read = 0
+    for chunk in pd.read_csv(
+        filepath,
+        usecols=["Cause Category", "Deaths", *dims],
+        thousands=",",
+        chunksize=chunksize,
+    ):
+        rows_read += len(chunk)
+        chunk = chunk[chunk["Cause Category"] == cause]
+        deaths = pd.to_numeric(chunk["Deaths"], errors="coerce")
+        if dims:
+            partials.append(deaths.groupby([chunk[dim] for dim in dims]).sum())
+        else:
+            partials.append(pd.Series([deaths.sum()]))
+
+    totals = pd.concat(partials)
+    if dims:
+        totals = totals.groupby(level=list(range(len(dims)))).sum()
+        totals_df = totals.rename("deaths").reset_index()
+    else:
+        totals_df = pd.DataFrame({"deaths": [totals.sum()]})
+    totals_df.insert(0, "year", year)
+    totals_df["deaths"] = totals_df["deaths"].astype("int64")
+    totals_df.attrs["rows_read"] = rows_read
+
+    return totals_df
+
+
+@instrumented
+def process_fig9_data(wait: bool = True) -> pd.DataFrame:
+    """
+    Average deficiencies per PRTF and per short-term hospital by year.
+
+    Parameters:
+    - wait: write clean_fig9_data.csv before returning; otherwise it is
+      written in the background
+    """
     df = pd.read_csv(data_path('youth-rtc', 'fig9.csv'), skipinitialspace=True)
     
     df.columns = df.columns.str.replace('\xa0', '', regex=True).str.strip()
-    df = df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
+    df = df.map(lambda x: x.strip() if isinstance(x, str) else x)
     df = df.replace({',': ''}, regex=True)
     for col in df.columns[1:]:  # Convert numeric columns; skip the first 'year' column
         df[col] = pd.to_numeric(df[col], errors='coerce')
@@ -91,43 +205,50 @@ def process_fig9_data():
          'def_per_prtf': def_per_prtf.values, 
          'def_per_sth': def_per_sth.values}
          )
-    clean_df.to_csv(repo_path('clean', 'clean_fig9_data.csv'), index=False)
+    write_csv(clean_df, repo_path('clean', 'clean_fig9_data.csv'), wait, index=False)
+    count(rows_read=len(df), rows_written=len(clean_df))
     
-    return None
+    return clean_df
 
 
-def convert_tsv_to_csv():
+@instrumented
+def convert_tsv_to_csv(tsv_filepath: str = None, csv_filepath: str = None, compress: bool = False):
     """
-    Convert a TSV file to a CSV file.
+    Convert a TSV file to a CSV file, streaming it in constant memory.
 
     Parameters:
-    - tsv_filepath: str, path to the input TSV file
-    - csv_filepath: str, path to the output CSV file
-    """
-    tsv_filepath = data_path("NMHSS", "N-MHSS-2010-DS0001-data-excel.tsv")
-    csv_filepath = data_path("NMHSS", "N-MHSS-2010-DS0001-data-excel.csv")
-    # Open the TSV file for reading and the CSV file for writing
-    with open(tsv_filepath, "r") as tsv_file, open(csv_filepath, "w") as csv_file:
-        # Read the TSV file line by line
-        for line in tsv_file:
-            # Replace tabs with commas and write to the CSV file
-            csv_file.write(line.replace("\t", ","))
+    - tsv_filepath: str, path to the input TSV file, defaults to the 2010 N-MHSS file
+    - csv_filepath: str, path to the output CSV file, defaults to the TSV path
+      with a .csv (or .csv.gz when compressing) extension
+    - compress: bool, gzip the output
+    """
+    if tsv_filepath is None:
+        tsv_filepath = data_path("NMHSS", "N-MHSS-2010-DS0001-data-excel.tsv")
+    if csv_filepath is None:
+        csv_filepath = os.path.splitext(tsv_filepath)[0] + (".csv.gz" if compress else ".csv")
+
+    tsv_to_csv(tsv_filepath, csv_filepath, compress=compress)
 
     return None
 
 
-def rename_files(source_dir, target_dir):
+@instrumented
+def rename_files(source_dir, target_dir, workers: int = None):
     """
     Rename files to contain only the year in their filename and convert TSV to CSV if needed,
-    then save a copy in the new folder. Includes logging for unmatched files.
+    then stage them in the new folder. Includes logging for unmatched files.
+
+    Files are hardlinked (or reflinked) rather than copied, and targets whose
+    source has not changed since the last run are left alone.
 
     Parameters:
     - source_dir: Directory containing the original files.
     - target_dir: Directory where the renamed/converted files will be saved.
+    - workers: Number of threads/processes used to link and convert files.
     """
     year_pattern = re.compile(r"\b(20\d{2})\b")
-    processed_files = 0
     unmatched_files = []
+    pairs = []
 
     for file in os.listdir(source_dir):
         match = year_pattern.search(file)
@@ -142,23 +263,26 @@ def rename_files(source_dir, target_dir):
             new_file_path = os.path.join(target_dir, new_file_name)
 
             if file_extension == ".tsv":
-                df = pd.read_csv(file_path, sep="\t")
                 new_file_path = new_file_path.replace(".tsv", ".csv")  # Convert to .csv
-                df.to_csv(new_file_path, index=False)
-            else:
-                shutil.copy(file_path, new_file_path)
-            processed_files += 1
+            pairs.append((file_path, new_file_path))
         else:
             unmatched_files.append(file)
 
+    stage_files(pairs, target_dir, workers=workers)
+
+    if unmatched_files:
+        print(f"No year in file name, not renamed: {', '.join(sorted(unmatched_files))}")
+
     return None
 
 
+@instrumented
 def manually_rename_files(source_dir, target_dir):
     files_to_rename = {
         "NMHSS_2017_PUF_CSV.csv": "2017.csv",
         "nmhss_puf_2016.csv": "2016.csv",
     }
+    pairs = []
 
     for original_name, new_name in files_to_rename.items():
         original_path = os.path.join(source_dir, original_name)
@@ -168,110 +292,538 @@ def manually_rename_files(source_dir, target_dir):
 
         if file_extension == ".tsv":
             # Convert TSV to CSV
-            df = pd.read_csv(original_path, sep="\t")
             new_path = new_path.replace(
                 ".tsv", ".csv"
             )  # Ensure the new path has a .csv extension
-            df.to_csv(new_path, index=False)
+            pairs.append((original_path, new_path))
         elif file_extension == ".csv":
-            # If it's already a CSV, just copy it over
-            shutil.copy(original_path, new_path)
+            # If it's already a CSV, just link it over
+            pairs.append((original_path, new_path))
         else:
             print(f"Unsupported file format for manual renaming: {original_name}")
 
-    return None
+    stage_files(pairs, target_dir)
 
+    return None
 
-def get_nmhss_container() -> dict:
 
-    df_container = dict()
+# declared dtypes for N-MHSS columns; every other column is inferred by
+# optimize_dtypes
+NMHSS_SCHEMA = {
+    "caseid": "string",
+    "lst": "category",
+    "stfips": "Int8",
+}
 
-    for filename in os.listdir(_dir_path()):
-        print(f"{filename}")
+# negative survey codes (logical skip, refused, don't know, missing, ...)
+NMHSS_MISSING_CODES = (-1, -2, -5, -7, -8, -9)
 
-    for filename in os.listdir(_dir_path()):
-        df = pd.read_csv(_dir_path(filename))
-        print(f"filename: {filename}")
-        year = filename.split(".")[0]
-        print(f"year: {year}")
+_BOOLEAN_STRINGS = {"yes": True, "no": False, "true": True, "false": False}
 
-        df.columns = df.columns.str.lower()
-        df = df.astype(str)
-        if year == 2010:
-            df["caseid"] = df["caseid"].str.zfill(5)
 
-            fips_col = fips_codes()
-            df = pd.merge(df, fips_col, on="stfips")
-            df = df.rename(columns={"stusps": "lst"})
-        else:
-            df["caseid"] = df["caseid"].str[4:]
+@instrumented
+def get_nmhss_container(
+    columns=None, use_cache=True, workers: int = None, memory_limit_mb: float = None, years=None
+) -> dict:
+    """
+    Load the renamed N-MHSS/N-SUMHSS years into a dict keyed by year,
+    reporting each year's load time and size as it completes.
 
-        df = df.map(lambda x: x.lower().strip() if isinstance(x, str) else x)
+    Years are loaded concurrently in worker processes. Each worker hands its
+    year back as a Feather (Arrow IPC) file rather than a pickled frame:
+    with use_cache that is the year's Feather cache, which is then
+    memory-mapped here; otherwise a temporary file.
 
-        df_container[year] = df
+    Parameters:
+    - columns: list of lower-case column names to load, defaults to all
+    - use_cache: read through the Feather cache in nmhss_cache_path(),
+      converting a year only when its source CSV changed
+    - workers: number of worker processes, defaults to one per CPU; with 1
+      (or without pyarrow) the years are loaded in this process
+    - memory_limit_mb: cap on the estimated memory of the years in flight
+      at once (NMHSS_MEMORY_FACTOR times each CSV's size); a year above
+      the cap on its own is loaded alone. Defaults to no cap.
+    - years: survey years to load, defaults to all; other years' files are
+      not opened
+    """
+    partitions = nmhss_dataset().select(years)
+    workers = min(workers or os.cpu_count() or 1, len(partitions)) or 1
+    loaded = {}
+    start = time.perf_counter()
+
+    def report(partition, df, seconds):
+        year = str(partition.year)
+        loaded[year] = df
+        print(
+            f"[{len(loaded)}/{len(partitions)}] {year}: {seconds:.2f}s, "
+            f"{nmhss_memory_usage(df) / 2**20:.1f} MiB"
+        )
+
+    if workers == 1 or not arrow_available():
+        for partition in partitions:
+            year_start = time.perf_counter()
+            if use_cache:
+                df = read_nmhss_year(partition, columns)
+            else:
+                df = load_nmhss_year(partition.path, str(partition.year))
+                if columns is not None:
+                    df = df[[col for col in columns if col in df.columns]]
+            report(partition, df, time.perf_counter() - year_start)
+    else:
+        with tempfile.TemporaryDirectory(prefix="nmhss-") as tmp_dir:
+            loading = _load_nmhss_years(partitions, use_cache, workers, memory_limit_mb, tmp_dir)
+            for partition, path, seconds in loading:
+                if use_cache:
+                    df = read_nmhss_year(partition, columns)
+                else:
+                    # read into memory: the temporary file goes away with tmp_dir
+                    df = read_feather(path, columns, memory_map=False)
+                report(partition, df, seconds)
+
+    df_container = {year: loaded[year] for year in sorted(loaded)}
+
+    total = sum(nmhss_memory_usage(df) for df in df_container.values())
+    print(
+        f"N-MHSS container: {total / 2**20:.1f} MiB, {len(df_container)} years "
+        f"in {time.perf_counter() - start:.2f}s with {workers} workers"
+    )
 
     return df_container
 
 
-def _dir_path(*args):
-    return os.path.join(data_path("NMHSS", "renamed", *args))
+@instrumented
+def convert_nmhss_to_feather(workers: int = None, memory_limit_mb: float = None, years=None):
+    """
+    Write (or refresh) the Feather cache for the renamed survey years
+    (default all), converting stale years concurrently in worker processes.
+    """
+    partitions = nmhss_dataset().select(years)
+    workers = min(workers or os.cpu_count() or 1, len(partitions)) or 1
+
+    if workers == 1 or not arrow_available():
+        for partition in partitions:
+            read_nmhss_year(partition, columns=[])
+    else:
+        for _ in _load_nmhss_years(partitions, True, workers, memory_limit_mb):
+            pass
+
+    print(f"N-MHSS Feather cache is up to date in {nmhss_cache_path()}")
+
+    return None
+
+
+# rough peak memory of loading a survey year, as a multiple of its CSV size
+NMHSS_MEMORY_FACTOR = 4
+
+
+def _load_nmhss_years(partitions, use_cache, workers, memory_limit_mb=None, tmp_dir=None):
+    """
+    Run _load_nmhss_file for each partition on a process pool, keeping the
+    estimated memory of the years in flight under memory_limit_mb, and yield
+    (partition, feather path, seconds) as they complete.
+    """
+    estimates = {partition: NMHSS_MEMORY_FACTOR * partition.size / 2**20 for partition in partitions}
+    queue = list(partitions)
+    running = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while queue or running:
+            while queue and len(running) < workers:
+                in_flight = sum(estimates[partition] for partition in running.values())
+                if running and memory_limit_mb is not None and in_flight + estimates[queue[0]] > memory_limit_mb:
+                    break
+                partition = queue.pop(0)
+                running[pool.submit(_load_nmhss_file, partition, use_cache, tmp_dir)] = partition
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                del running[future]
+                yield future.result()
+
+
+def _load_nmhss_file(partition: Partition, use_cache: bool, tmp_dir: str = None) -> tuple:
+    # runs in a worker process
+    start = time.perf_counter()
+    year = str(partition.year)
+
+    if use_cache:
+        path = nmhss_cache_path(f"{year}.feather")
+        refresh_cache(
+            partition.path,
+            path,
+            lambda source: load_nmhss_year(source, year),
+            version=_nmhss_loader_version(),
+        )
+    else:
+        path = os.path.join(tmp_dir, f"{year}.feather")
+        write_feather(load_nmhss_year(partition.path, year), path)
+
+    return partition, path, time.perf_counter() - start
+
+
+def nmhss_dataset() -> PartitionedDataset:
+    """
+    The renamed survey CSVs, one partition per year.
+    """
+    return PartitionedDataset("nmhss", suffix=".csv")
+
+
+def read_nmhss_year(partition: Partition, columns=None) -> pd.DataFrame:
+    """
+    Read one renamed survey year through its memory-mapped Feather cache.
+
+    Parameters:
+    - partition: Partition of nmhss_dataset()
+    - columns: list of lower-case column names to read, defaults to all
+    """
+    year = str(partition.year)
+
+    return read_cached(
+        partition.path,
+        nmhss_cache_path(f"{year}.feather"),
+        lambda source: load_nmhss_year(source, year),
+        columns=columns,
+        version=_nmhss_loader_version(),
+    )
+
+
+def nmhss_cache_path(*args):
+    return data_path("NMHSS", "feather", *args)
+
+
+def _nmhss_loader_version() -> str:
+    funcs = (load_nmhss_year, optimize_dtypes, _compact_numeric, _compact_strings)
+
+    schema = ",".join(f"{col}:{dtype}" for col, dtype in sorted(NMHSS_SCHEMA.items()))
+
+    return "-".join(function_hash(func)[:12] for func in funcs) + f"-{schema}"
+
+
+@instrumented
+def load_nmhss_year(filepath: str, year: str, schema: dict = None) -> pd.DataFrame:
+    """
+    Load one N-MHSS/N-SUMHSS survey year with compact dtypes.
+
+    Parameters:
+    - filepath: str, path to the renamed survey CSV
+    - year: str, survey year the file belongs to
+    - schema: dict of lower-case column name -> dtype, defaults to NMHSS_SCHEMA
+    """
+    schema = NMHSS_SCHEMA if schema is None else schema
+
+    header = pd.read_csv(filepath, nrows=0).columns
+    string_cols = {
+        col: str for col in header if schema.get(col.lower()) in ("string", "category")
+    }
+    df = pd.read_csv(filepath, dtype=string_cols, low_memory=False)
+    count(rows_read=len(df))
+    df.columns = df.columns.str.lower()
+
+    if year == "2010":
+        df["caseid"] = df["caseid"].str.zfill(5)
+
+        fips_col = fips_codes()
+        df = pd.merge(df, fips_col, on="stfips")
+        df = df.rename(columns={"stusps": "lst"})
+    else:
+        df["caseid"] = df["caseid"].str[4:]
+
+    return optimize_dtypes(df, schema)
+
+
+def optimize_dtypes(df: pd.DataFrame, schema: dict = None) -> pd.DataFrame:
+    """
+    Downcast each column to the smallest dtype that holds it: declared dtypes
+    from schema, small (nullable) ints, nullable booleans for yes/no
+    answers, categoricals for repeated strings. Strings are stripped and
+    lower-cased.
+
+    Integer columns, 0/1 answers included, keep the negative survey codes
+    (NMHSS_MISSING_CODES) as values so "not applicable" and "refused or
+    missing" stay distinguishable; only blank cells become NA.
+    """
+    schema = {} if schema is None else schema
+
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+            series = series.str.strip().str.lower()
+
+        if col in schema:
+            df[col] = series.astype(schema[col])
+        elif pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            df[col] = _compact_numeric(series)
+        elif series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+            df[col] = _compact_strings(series)
+
+    return df
+
+
+def _compact_numeric(series: pd.Series) -> pd.Series:
+    values = series.dropna()
+    if values.empty or not (values == values.round()).all():
+        return pd.to_numeric(series, downcast="float")
+
+    # no boolean shortcut for 0/1 answers: that would fold the distinct
+    # missing codes into one NA, and a column holding only codes would come
+    # out all-NA; every integer column keeps its codes in a small int
+    for dtype in ("Int8", "Int16", "Int32", "Int64"):
+        info = np.iinfo(dtype.lower())
+        if info.min <= values.min() and values.max() <= info.max:
+            break
+    if series.isna().any():
+        return series.astype(dtype)
+
+    return series.astype(dtype.lower())
+
+
+def _compact_strings(series: pd.Series) -> pd.Series:
+    values = series.dropna()
+    if not values.empty and values.isin(list(_BOOLEAN_STRINGS)).all():
+        return series.map(_BOOLEAN_STRINGS).astype("boolean")
+    if values.nunique() <= len(series) // 2:
+        return series.astype("category")
+
+    return series.astype("string")
+
+
+def nmhss_memory_usage(df: pd.DataFrame) -> int:
+    """
+    Bytes held by a survey frame, including string payloads.
+    """
+    return int(df.memory_usage(deep=True).sum())
 
 
 def fips_codes() -> pd.DataFrame:
 
-    df = pd.read_csv(data_path("us-state-ansi-fips.csv"))
+    df = read_frame(data_path("us-state-ansi-fips.csv"))
     df = df.drop("stname", axis=1)
     df = df.rename(columns={" st": "stfips"})
 
     return df
 
 
-def process_qcor_prtf_data():
+# QCOR export columns -> (survey type, deficiency kind) axes of the cube
+QCOR_COLUMNS = {
+    "Unnamed: 1": ("std_surv", "std"),
+    "Unnamed: 2": ("std_surv", "cop"),
+    "Unnamed: 3": ("comp_surv", "std"),
+    "Unnamed: 4": ("comp_surv", "cop"),
+}
+QCOR_SURVEYS = ("std_surv", "comp_surv")
+QCOR_KINDS = ("std", "cop")
+# the export's own Total column, written to clean_fig10_data.csv as total_surv
+QCOR_TOTAL = "Unnamed: 7"
+QCOR_NATIONAL = "National Total"
+# marks a count the export did not report, while the cube is being filled
+QCOR_UNREPORTED = -1
 
-    dir_path = data_path("qcor", "prtf")
-    processed_dfs = []
 
-    for file in os.listdir(dir_path):
-        # get year of file from csv name
-        year_match = re.search(r"(\d{4})", file)
-        if year_match:
-            year = year_match.group(1)
+class QcorCube(NamedTuple):
+    """
+    PRTF deficiency counts as a state x year x survey type x kind array,
+    labelled along each axis. Kind is a standard ("std") or Condition of
+    Participation ("cop") deficiency.
+
+    Cells an export did not report (a state missing from that year, or a
+    blank cell) count as zero in counts, so totals are unaffected; reported
+    tells them apart from reported zeros. totals holds the export's Total
+    column per state and year (zero where blank). Either is None for cubes
+    saved before it was recorded.
+    """
 
-        df = pd.read_csv(os.path.join(dir_path, file))
-        df = get_qcor_national_totals(df, year)
+    counts: np.ndarray
+    states: np.ndarray
+    years: np.ndarray
+    surveys: tuple = QCOR_SURVEYS
+    kinds: tuple = QCOR_KINDS
+    reported: np.ndarray = None
+    totals: np.ndarray = None
+
+    def state_frame(self, state: str) -> pd.DataFrame:
+        """
+        Yearly counts for one state, in the clean_fig10_data.csv layout.
+        """
+        index = np.flatnonzero(self.states == state)
+        if not len(index):
+            raise KeyError(f"No QCOR data for state: {state}")
+
+        totals = None if self.totals is None else self.totals[index[0]]
+
+        return self._frame(self.counts[index[0]], self.years, totals)
+
+    def national_frame(self) -> pd.DataFrame:
+        """
+        National yearly counts: a year's National Total row where its export
+        carries one, the sum over states otherwise. Years reporting neither
+        are left out rather than shown as zero.
+        """
+        reported = self.reported if self.reported is not None else np.ones(self.counts.shape, dtype=bool)
+        is_state = self.states != QCOR_NATIONAL
+        counts = self.counts[is_state].sum(axis=0)
+        totals = None if self.totals is None else self.totals[is_state].sum(axis=0)
+        has_row = reported[is_state].any(axis=(0, 2, 3))
+
+        national = np.flatnonzero(~is_state)
+        if len(national):
+            has_national = reported[national[0]].any(axis=(1, 2))
+            counts = np.where(has_national[:, None, None], self.counts[national[0]], counts)
+            if totals is not None:
+                totals = np.where(has_national, self.totals[national[0]], totals)
+            has_row |= has_national
+
+        return self._frame(counts[has_row], self.years[has_row], None if totals is None else totals[has_row])
+
+    def _frame(self, counts: np.ndarray, years: np.ndarray, totals: np.ndarray = None) -> pd.DataFrame:
+        df = pd.DataFrame(
+            {
+                f"{survey}_{kind}": counts[:, i, j]
+                for i, survey in enumerate(self.surveys)
+                for j, kind in enumerate(self.kinds)
+            }
+        )
+        if totals is not None:
+            df["total_surv"] = totals
+        for i, survey in enumerate(self.surveys):
+            df[f"{survey}_tot"] = counts[:, i, :].sum(axis=1)
+        df["year"] = years.astype(str)
+
+        return df
+
+
+@instrumented
+def process_qcor_prtf_data(workers: int = None, wait: bool = True) -> pd.DataFrame:
+    """
+    National PRTF deficiency totals by year and survey type (figure 10),
+    from the QCOR cube.
 
-        processed_dfs.append(df)
+    Parameters:
+    - workers: number of reader threads, see build_qcor_cube
+    - wait: write clean_fig10_data.csv before returning; otherwise it is
+      written in the background
+    """
+    cube = build_qcor_cube(workers=workers)
 
-    out_df = pd.concat(processed_dfs)
-    #out_df = out_df.reset_index(drop=True)
+    out_df = cube.national_frame()
 
-    out_df.to_csv(processed_data_path("clean_fig10_data.csv"), index=False)
+    write_csv(out_df, processed_data_path("clean_fig10_data.csv"), wait, index=False)
+    count(rows_written=len(out_df))
 
-    return None
+    return out_df
 
 
-def get_qcor_national_totals(df: pd.DataFrame, year: str) -> pd.DataFrame:
-    df = df.rename(
-        columns={
-            "Unnamed: 1": "std_surv_std",
-            "Unnamed: 2": "std_surv_cop",
-            "Unnamed: 3": "comp_surv_std",
-            "Unnamed: 4": "comp_surv_cop",
-            "Unnamed: 7": "total_surv"
-        }
-    ).drop(["Unnamed: 5", "Unnamed: 6"], axis=1)
-
-    df = (
-        df[df["Selection Criteria"] == "National Total"]
-        .drop("Selection Criteria", axis=1)
-        .copy()
+@instrumented
+def build_qcor_cube(workers: int = None, save: bool = None, years=None) -> QcorCube:
+    """
+    Parse the yearly QCOR PRTF exports in data_path("qcor", "prtf"), keeping
+    all states, into a QcorCube saved to qcor_cube_path().
+
+    Parameters:
+    - workers: number of reader threads
+    - save: write the cube to qcor_cube_path(); defaults to True for the
+      full cube and False for a years subset, which cannot be saved there
+    - years: years to include, defaults to every export
+    """
+    if save is None:
+        save = years is None
+    elif save and years is not None:
+        raise ValueError("Only the full QCOR cube is saved; pass save=False with years")
+
+    dataset = PartitionedDataset("qcor")
+    for relpath in dataset.unpartitioned:
+        print(f"No year in QCOR file name, skipped: {relpath}")
+
+    by_year = dataset.read(lambda partition: _read_qcor_states(partition.path), years=years, workers=workers)
+    if not by_year:
+        raise FileNotFoundError(f"No QCOR exports in {data_path('qcor', 'prtf')}")
+
+    years = list(by_year)
+    yearly = list(by_year.values())
+    count(rows_read=sum(len(counts) for counts in yearly))
+
+    states = sorted(set().union(*(counts.keys() for counts in yearly)) - {QCOR_NATIONAL})
+    if any(QCOR_NATIONAL in counts for counts in yearly):
+        states.append(QCOR_NATIONAL)
+    state_index = {state: i for i, state in enumerate(states)}
+
+    cube_counts = np.full(
+        (len(states), len(years), len(QCOR_SURVEYS), len(QCOR_KINDS)), QCOR_UNREPORTED, dtype=np.int32
     )
+    cube_totals = np.zeros((len(states), len(years)), dtype=np.int32)
+    for year_i, counts in enumerate(yearly):
+        for state, (values, total) in counts.items():
+            cube_counts[state_index[state], year_i] = values
+            cube_totals[state_index[state], year_i] = total
+
+    reported = cube_counts != QCOR_UNREPORTED
+    cube = QcorCube(
+        np.where(reported, cube_counts, 0),
+        np.array(states),
+        np.array(years),
+        reported=reported,
+        totals=cube_totals,
+    )
+    if save:
+        np.savez(
+            qcor_cube_path(),
+            counts=cube.counts,
+            states=cube.states,
+            years=cube.years,
+            surveys=np.array(cube.surveys),
+            kinds=np.array(cube.kinds),
+            reported=cube.reported,
+            totals=cube.totals,
+        )
+
+    return cube
+
+
+def load_qcor_cube() -> QcorCube:
+    """
+    Read the cube written by build_qcor_cube without touching the CSVs.
+    """
+    with np.load(qcor_cube_path()) as saved:
+        return QcorCube(
+            saved["counts"],
+            saved["states"],
+            saved["years"],
+            tuple(saved["surveys"]),
+            tuple(saved["kinds"]),
+            saved["reported"] if "reported" in saved else None,
+            saved["totals"] if "totals" in saved else None,
+        )
 
-    df["std_surv_tot"] = df[["std_surv_std", "std_surv_cop"]].astype(int).sum(axis=1)
-    df["comp_surv_tot"] = df[["comp_surv_std", "comp_surv_cop"]].astype(int).sum(axis=1)
-    df["year"] = year
 
-    return df
+def qcor_cube_path():
+    return processed_data_path("qcor_prtf_cube.npz")
+
+
+def _read_qcor_states(filepath: str) -> dict:
+    """
+    state -> ((survey type x kind) counts, Total column) for one yearly
+    export; header and blank rows are dropped, blank count cells are
+    QCOR_UNREPORTED and a blank Total is 0.
+    """
+    df = pd.read_csv(filepath, usecols=["Selection Criteria", *QCOR_COLUMNS, QCOR_TOTAL], thousands=",")
+    values = df[list(QCOR_COLUMNS)].apply(pd.to_numeric, errors="coerce")
+    keep = values.notna().any(axis=1) & df["Selection Criteria"].notna()
+
+    states = df.loc[keep, "Selection Criteria"].astype(str).str.strip()
+    totals = pd.to_numeric(df.loc[keep, QCOR_TOTAL], errors="coerce").fillna(0).to_numpy(dtype=np.int32)
+    values = values[keep].fillna(QCOR_UNREPORTED).to_numpy(dtype=np.int32)
+    cells = [
+        (QCOR_SURVEYS.index(survey), QCOR_KINDS.index(kind))
+        for survey, kind in QCOR_COLUMNS.values()
+    ]
+
+    counts = {}
+    for state, row, total in zip(states, values, totals):
+        cell = np.full((len(QCOR_SURVEYS), len(QCOR_KINDS)), QCOR_UNREPORTED, dtype=np.int32)
+        for (survey_i, kind_i), value in zip(cells, row):
+            cell[survey_i, kind_i] = value
+        counts[state] = (cell, int(total))
+
+    return counts
 
 
 if __name__ == "__main__":
@@ -0,0 +1,222 @@
+import time
+
+_START = time.perf_counter()
+
+import argparse
+import importlib
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# stage names -> functions, kept as strings so nothing heavy is imported
+# until a stage is actually selected
+CLEAN_STAGES = {
+    "fig4": "process_fig4_data",
+    "fig8": "process_fig8_data",
+    "fig9": "process_fig9_data",
+    "fig10": "process_qcor_prtf_data",
+    "nmhss": "convert_nmhss_to_feather",
+}
+FIGURE_NAMES = ["fig3", "fig4", "fig5", "fig6", "fig7", "fig8", "fig9", "fig10", "fig11"]
+
+_import_times = {}
+
+
+def lazy_import(name: str):
+    """
+    Import a module on demand, recording how long the import took.
+    """
+    if name not in sys.modules:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        _import_times[name] = time.perf_counter() - start
+
+    return sys.modules[name]
+
+
+def run_clean(args):
+    clean_data = lazy_import("clean_data")
+    for name in args.stages or list(CLEAN_STAGES):
+        getattr(clean_data, CLEAN_STAGES[name])()
+
+
+def run_plot(args):
+    _use_agg()
+    plotting = lazy_import("plotting")
+    results = plotting.build_figures(
+        args.figures or None, workers=args.workers, profile="draft" if args.draft else "publication"
+    )
+
+    return 1 if any(result["error"] for result in results.values()) else 0
+
+
+def run_export(args):
+    _use_agg()
+    plotting = lazy_import("plotting")
+    results = plotting.build_figures(
+        args.figures or None,
+        workers=args.workers,
+        profile="draft" if args.draft else "publication",
+        formats=args.formats,
+        report=args.report,
+    )
+
+    return 1 if any(result["error"] for result in results.values()) else 0
+
+
+def run_all(args):
+    _use_agg()
+    pipeline = lazy_import("pipeline")
+    if args.dag:
+        status = pipeline.run_dag(
+            force=args.force, workers=args.workers, memory_budget_mb=args.memory_budget, trace=args.trace
+        )
+    else:
+        status = pipeline.run_pipeline(force=args.force, workers=args.workers, trace=args.trace, handoff=args.handoff)
+
+    return 1 if "failed" in status.values() else 0
+
+
+def run_watch(args):
+    _use_agg()
+    pipeline = lazy_import("pipeline")
+    pipeline.watch(args.stages or None, interval=args.interval)
+
+
+def run_ingest(args):
+    query = lazy_import("query")
+    query.ingest(args.sources or query.SOURCES, path=args.database, force=args.force)
+
+
+def run_sql(args):
+    query = lazy_import("query")
+    print(query.query(args.sql, path=args.database).to_string(index=False))
+
+
+def run_manifest(args):
+    manifest = lazy_import("util.manifest").get_manifest()
+    changed = manifest.refresh(args.datasets or None, force=args.force)
+    print(f"Input manifest: {manifest.path} (data root {manifest.data_root})")
+    for dataset in args.datasets or manifest.datasets:
+        entries = manifest.entries(dataset)
+        years = sorted({entry["year"] for entry in entries if entry["year"] is not None})
+        span = f"{years[0]}-{years[-1]}" if years else "no years"
+        note = " (updated)" if dataset in changed else ""
+        print(f"{dataset}: {len(entries)} files, {span}, {sum(entry['size'] for entry in entries) / 2**20:.1f} MiB{note}")
+
+
+def run_fonts(args):
+    """
+    Build matplotlib's font cache into args.cache_dir so it can be shipped
+    with a container image and reused through MPLCONFIGDIR.
+    """
+    os.makedirs(args.cache_dir, exist_ok=True)
+    os.environ["MPLCONFIGDIR"] = os.path.abspath(args.cache_dir)
+    font_manager = lazy_import("matplotlib.font_manager")
+    font_manager.findfont(font_manager.FontProperties())
+    print(f"Font cache written to {os.environ['MPLCONFIGDIR']}; set MPLCONFIGDIR to reuse it")
+
+
+def _check_choices(parser, args, name: str, allowed):
+    unknown = [value for value in getattr(args, name) if value not in allowed]
+    if unknown:
+        parser.error(
+            f"argument {name}: invalid choice: {', '.join(unknown)} (choose from {', '.join(allowed)})"
+        )
+
+
+def _use_agg():
+    if "MPLBACKEND" not in os.environ:
+        os.environ["MPLBACKEND"] = "Agg"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="youth-prtf", description="Run the youth PRTF cleaning and figure pipeline.")
+    parser.add_argument("--timing", action="store_true", help="report startup and import time")
+    parser.add_argument("--font-cache", metavar="DIR", help="matplotlib config/font cache directory to use")
+    parser.add_argument("--data-root", metavar="DIR", help="raw data directory, overriding $YOUTH_PRTF_DATA_PATH")
+    parser.add_argument("--repo-root", metavar="DIR", help="repository directory, overriding $YOUTH_PRTF_REPO_PATH")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    clean = commands.add_parser("clean", help="run cleaning steps")
+    clean.add_argument("stages", nargs="*", help=f"{', '.join(CLEAN_STAGES)}; defaults to all")
+    clean.set_defaults(func=run_clean, choices=("stages", list(CLEAN_STAGES)))
+
+    plot = commands.add_parser("plot", help="render figures to out/")
+    plot.add_argument("figures", nargs="*", help="fig3 ... fig11; defaults to all")
+    plot.add_argument("--workers", type=int)
+    plot.add_argument("--draft", action="store_true", help="fast low-resolution render to out/draft/")
+    plot.set_defaults(func=run_plot, choices=("figures", FIGURE_NAMES))
+
+    export = commands.add_parser("export", help="write figures in several formats and/or a PDF report")
+    export.add_argument("figures", nargs="*", help="fig3 ... fig11; defaults to all")
+    export.add_argument("--formats", nargs="+", default=["png", "svg", "pdf"])
+    export.add_argument("--report", metavar="FILE", help="also collect the figures into this PDF in out/")
+    export.add_argument("--workers", type=int)
+    export.add_argument("--draft", action="store_true", help="fast low-resolution render to out/draft/")
+    export.set_defaults(func=run_export, choices=("figures", FIGURE_NAMES))
+
+    everything = commands.add_parser("all", help="run the incremental clean -> plot pipeline")
+    everything.add_argument("--workers", type=int)
+    everything.add_argument("--force", action="store_true", help="rebuild fresh stages too")
+    everything.add_argument("--trace", help="write stage timings to this JSON file")
+    everything.add_argument(
+        "--handoff", action="store_true", help="plot cleaned frames directly, writing clean/ CSVs in the background"
+    )
+    everything.add_argument("--dag", action="store_true", help="schedule stages as a dependency graph")
+    everything.add_argument("--memory-budget", type=float, default=2048, metavar="MB", help="memory cap for --dag")
+    everything.set_defaults(func=run_all)
+
+    watch = commands.add_parser("watch", help="rebuild stages whenever their input files change")
+    watch.add_argument("stages", nargs="*", help="stage names (e.g. clean_fig8, fig8), defaults to all")
+    watch.add_argument("--interval", type=float, default=0.5, help="seconds between polls")
+    watch.set_defaults(func=run_watch)
+
+    ingest = commands.add_parser("ingest", help="load the raw sources into the query database")
+    ingest.add_argument("sources", nargs="*", help="wisqars, qcor or nmhss; defaults to all")
+    ingest.add_argument("--force", action="store_true", help="re-ingest unchanged sources too")
+    ingest.add_argument("--database", help="database file (.sqlite, or .duckdb with duckdb installed)")
+    ingest.set_defaults(func=run_ingest, choices=("sources", ["wisqars", "qcor", "nmhss"]))
+
+    sql = commands.add_parser("sql", help="run a query against the ingested sources")
+    sql.add_argument("sql")
+    sql.add_argument("--database", help="database file, as for ingest")
+    sql.set_defaults(func=run_sql)
+
+    manifest = commands.add_parser("manifest", help="update and summarise the manifest of raw input files")
+    manifest.add_argument("datasets", nargs="*", help="wisqars, qcor, nmhss or youth-rtc, defaults to all")
+    manifest.add_argument("--force", action="store_true", help="list unchanged directories again too")
+    manifest.set_defaults(func=run_manifest)
+
+    fonts = commands.add_parser("fonts", help="prebuild the matplotlib font cache")
+    fonts.add_argument("cache_dir")
+    fonts.set_defaults(func=run_fonts)
+
+    args = parser.parse_args(argv)
+    # checked here rather than with add_argument(choices=...): before Python
+    # 3.12 an empty nargs="*" list is itself rejected as an invalid choice
+    if getattr(args, "choices", None):
+        _check_choices(parser, args, *args.choices)
+    if args.font_cache:
+        os.environ["MPLCONFIGDIR"] = os.path.abspath(args.font_cache)
+    if args.data_root or args.repo_root:
+        lazy_import("util.env").configure(
+            data=args.data_root and os.path.abspath(args.data_root),
+            repo=args.repo_root and os.path.abspath(args.repo_root),
+        )
+
+    ready = time.perf_counter()
+    code = args.func(args) or 0
+
+    if args.timing:
+        print(f"startup: {ready - _START:.3f}s")
+        for name, seconds in _import_times.items():
+            print(f"import {name}: {seconds:.3f}s")
+        print(f"total: {time.perf_counter() - _START:.3f}s")
+
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
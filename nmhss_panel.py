@@ -0,0 +1,151 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+import clean_data
+
+# N-MHSS facilitytype code for residential treatment centers for children
+RTC_CHILDREN = 3
+
+PANEL_COLUMNS = ("lst", "facilitytype")
+
+
+class FacilityPanel(NamedTuple):
+    """
+    N-MHSS/N-SUMHSS facilities across survey years in long format.
+
+    - frame: one row per facility and year, indexed by a sorted
+      (facility_id, year) MultiIndex
+    - caseids: normalised case id of each facility_id (facility_id is the
+      position in this array)
+    - years: survey years in the panel, ascending
+    - by_year: inverted index, year -> sorted array of the facility ids
+      surveyed that year
+    - year_rows: year -> positions in frame of that year's rows
+
+    Facility sets are sorted integer arrays, so the set queries below are
+    vectorised numpy operations rather than loops over years.
+    """
+
+    frame: pd.DataFrame
+    caseids: np.ndarray
+    years: tuple
+    by_year: dict
+    year_rows: dict
+
+    def facilities(self, year: int, **equals) -> np.ndarray:
+        """
+        Sorted ids of the facilities surveyed in year, optionally only those
+        whose columns equal the given values (e.g. facilitytype=RTC_CHILDREN).
+        """
+        if not equals:
+            return self.by_year[year]
+
+        rows = self.year_rows[year]
+        mask = np.ones(len(rows), dtype=bool)
+        for col, value in equals.items():
+            matches = self.frame[col].iloc[rows] == value
+            mask &= matches.fillna(False).to_numpy(dtype=bool)
+
+        return np.unique(self.frame.index.get_level_values("facility_id").to_numpy()[rows[mask]])
+
+    def exits(self, start: int, end: int, **equals) -> np.ndarray:
+        """
+        Facilities surveyed in start (matching equals there) that are absent
+        from the end survey, e.g. centers that closed between the two years.
+        """
+        return np.setdiff1d(self.facilities(start, **equals), self.by_year[end], assume_unique=True)
+
+    def entries(self, start: int, end: int, **equals) -> np.ndarray:
+        """
+        Facilities surveyed in end (matching equals there) that were absent
+        from the start survey.
+        """
+        return np.setdiff1d(self.facilities(end, **equals), self.by_year[start], assume_unique=True)
+
+    def survival(self, cohort_year: int, **equals) -> pd.Series:
+        """
+        Share of the facilities surveyed in cohort_year (matching equals
+        there) still surveyed in each year from cohort_year on.
+        """
+        cohort = self.facilities(cohort_year, **equals)
+        years = [year for year in self.years if year >= cohort_year]
+        shares = [
+            np.isin(cohort, self.by_year[year], assume_unique=True).mean() if len(cohort) else np.nan
+            for year in years
+        ]
+
+        return pd.Series(shares, index=pd.Index(years, name="year"), name="survival")
+
+    def history(self, facility_id: int) -> pd.DataFrame:
+        """
+        Rows of one facility, one per year it was surveyed.
+        """
+        return self.frame.loc[facility_id]
+
+    def lookup(self, caseid: str) -> int:
+        """
+        facility_id of a normalised case id.
+        """
+        index = np.searchsorted(self.caseids, caseid)
+        if index == len(self.caseids) or self.caseids[index] != caseid:
+            raise KeyError(f"No facility with case id: {caseid}")
+
+        return int(index)
+
+
+def build_panel(container: dict = None, columns=PANEL_COLUMNS, years=None) -> FacilityPanel:
+    """
+    Stack the per-year survey frames into a FacilityPanel, encoding the
+    normalised case ids as integer facility ids.
+
+    Parameters:
+    - container: dict of year -> frame as returned by get_nmhss_container,
+      loaded (caseid plus columns only) when not given
+    - columns: survey columns to keep on the panel
+    - years: survey years to load when container is not given, defaults to all
+    """
+    if container is None:
+        container = clean_data.get_nmhss_container(columns=["caseid", *columns], years=years)
+
+    frames = []
+    for year, df in container.items():
+        frame = pd.DataFrame(
+            {
+                "caseid": df["caseid"].astype(str).to_numpy(),
+                "year": np.full(len(df), int(year), dtype=np.int16),
+            }
+        )
+        for col in columns:
+            if col in df.columns:
+                frame[col] = df[col].array
+        frames.append(frame)
+
+    long_df = pd.concat(frames, ignore_index=True)
+    for col in columns:
+        if col in long_df.columns and long_df[col].dtype == object:
+            long_df[col] = long_df[col].astype("category")
+
+    codes, caseids = pd.factorize(long_df.pop("caseid"), sort=True)
+    long_df.insert(0, "facility_id", codes.astype(np.int32))
+
+    duplicated = long_df.duplicated(["facility_id", "year"])
+    if duplicated.any():
+        print(f"Dropped {int(duplicated.sum())} repeated case ids within a survey year")
+        long_df = long_df[~duplicated]
+
+    long_df = long_df.sort_values(["facility_id", "year"]).set_index(["facility_id", "year"])
+
+    years = long_df.index.get_level_values("year").to_numpy()
+    ids = long_df.index.get_level_values("facility_id").to_numpy()
+    year_rows = {int(year): np.flatnonzero(years == year) for year in np.unique(years)}
+    by_year = {year: np.unique(ids[rows]) for year, rows in year_rows.items()}
+
+    return FacilityPanel(
+        frame=long_df,
+        caseids=np.asarray(caseids, dtype=object),
+        years=tuple(sorted(year_rows)),
+        by_year=by_year,
+        year_rows=year_rows,
+    )
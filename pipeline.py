@@ -0,0 +1,515 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, NamedTuple
+
+import clean_data
+import plotting
+from util import artifacts, env, instrument
+from util.cache import BuildCache, expand_paths
+from util.env import data_path, repo_path
+from util.manifest import get_manifest
+
+
+class Stage(NamedTuple):
+    name: str
+    run: Callable
+    funcs: tuple
+    inputs: list
+    outputs: list
+
+
+def cache_path(*args):
+    return repo_path(".build_cache.json", *args)
+
+
+def clean_stages() -> list:
+    # the yearly exports are listed from the input manifest, so checking a
+    # stage is a stat per file rather than a walk of its directory
+    clean = clean_data.processed_data_path
+    manifest = get_manifest()
+
+    return [
+        Stage(
+            "clean_fig4",
+            clean_data.process_fig4_data,
+            (clean_data.process_fig4_data,),
+            [data_path("youth-rtc", "fig4.csv")],
+            [clean("clean_fig4_data.csv")],
+        ),
+        Stage(
+            "clean_fig8",
+            clean_data.process_fig8_data,
+            (
+                clean_data.process_fig8_data,
+                clean_data.aggregate_wisqars_deaths,
+                clean_data._sum_wisqars_file,
+            ),
+            manifest.files("wisqars"),
+            [clean("clean_fig8_data.csv")],
+        ),
+        Stage(
+            "clean_fig9",
+            clean_data.process_fig9_data,
+            (clean_data.process_fig9_data,),
+            [data_path("youth-rtc", "fig9.csv")],
+            [clean("clean_fig9_data.csv")],
+        ),
+        Stage(
+            "clean_fig10",
+            clean_data.process_qcor_prtf_data,
+            (
+                clean_data.process_qcor_prtf_data,
+                clean_data.build_qcor_cube,
+                clean_data._read_qcor_states,
+            ),
+            manifest.files("qcor"),
+            [clean("clean_fig10_data.csv"), clean_data.qcor_cube_path()],
+        ),
+    ]
+
+
+def plot_stages() -> list:
+    # every figure is drawn by the same spec renderer, so any change to
+    # plotting.py (a spec, the renderer or the save path) counts as a code change
+    return [
+        Stage(
+            name,
+            partial(plotting.FIGURES[name], save=True),
+            (plotting,),
+            [plotting.input_path(spec.input)],
+            [plotting.out_path(f"{name}.png")],
+        )
+        for name, spec in plotting.FIGURE_SPECS.items()
+    ]
+
+
+def pipeline_stages() -> list:
+    return clean_stages() + plot_stages()
+
+
+def run_pipeline(names=None, force=False, workers=None, trace: str = None, handoff: bool = False) -> dict:
+    """
+    Run the clean -> plot pipeline, skipping every stage whose inputs, code
+    and outputs are unchanged since it last ran.
+
+    Parameters:
+    - names: stage names to consider (e.g. "clean_fig8", "fig8"), defaults to all.
+    - force: rebuild the selected stages even if they are fresh.
+    - workers: worker processes used for the figures, see build_figures.
+    - trace: path to write per-stage timing and memory spans to; a path
+      ending in ".trace.json" gets the Chrome trace format.
+    - handoff: pass each rebuilt clean frame straight to the figures drawn
+      from it, rendered in this process while the CSV is written in the
+      background, instead of parsing the CSV back.
+
+    Returns a dict of stage name -> "reused", "rebuilt" or "failed".
+    """
+    start = time.perf_counter()
+    if trace is not None:
+        instrument.start_run()
+    stages = pipeline_stages()
+    if names is not None:
+        stages = [stage for stage in stages if stage.name in names]
+
+    cache = BuildCache(cache_path())
+    status = {}
+
+    figure_stages = {stage.name: stage for stage in stages if stage.name in plotting.FIGURES}
+    for stage in stages:
+        if stage.name in plotting.FIGURES:
+            continue
+        if handoff:
+            readers = [
+                figure_stages[name]
+                for name in plotting.figures_for_inputs(stage.outputs)
+                if name in figure_stages
+            ]
+            status.update(_run_with_handoff(cache, stage, force, readers))
+        else:
+            status[stage.name] = _run_stage(cache, stage, force)
+
+    # figures are fingerprinted after cleaning so they see the new clean/ files
+    stale = {}
+    for stage in stages:
+        if stage.name in plotting.FIGURES and stage.name not in status:
+            fingerprint = cache.fingerprint(stage.inputs, stage.funcs)
+            if not force and cache.is_fresh(stage.name, fingerprint):
+                status[stage.name] = "reused"
+            else:
+                stale[stage.name] = (stage, fingerprint)
+
+    if stale:
+        results = plotting.build_figures(stale, workers=workers)
+        for name, (stage, fingerprint) in stale.items():
+            if results[name]["error"] is None:
+                cache.record(name, fingerprint, stage.outputs)
+                status[name] = "rebuilt"
+            else:
+                status[name] = "failed"
+
+    cache.save()
+
+    for state in ("reused", "rebuilt", "failed"):
+        stage_names = [name for name, value in status.items() if value == state]
+        if stage_names:
+            print(f"{state} ({len(stage_names)}): {', '.join(stage_names)}")
+    print(f"Pipeline finished in {time.perf_counter() - start:.2f}s")
+
+    if trace is not None:
+        instrument.summarize(instrument.finish_run(trace))
+        print(f"Stage timings written to {trace}")
+
+    return status
+
+
+def stage_graph(stages: list) -> dict:
+    """
+    Map each stage name to the names of the stages that write its inputs;
+    inputs nobody writes are raw files.
+    """
+    producers = {os.path.abspath(path): stage.name for stage in stages for path in stage.outputs}
+
+    return {
+        stage.name: sorted(
+            {producers[path] for path in map(os.path.abspath, stage.inputs) if path in producers}
+        )
+        for stage in stages
+    }
+
+
+def memory_estimate_mb(stage: Stage) -> float:
+    """
+    Rough peak memory of a stage, for the scheduler's budget: a parsed frame
+    takes a few times its file size, and a 300 dpi canvas about 100 MB.
+    """
+    if stage.name in plotting.FIGURES:
+        return 100.0
+    size = sum(os.path.getsize(path) for path in expand_paths(stage.inputs) if os.path.exists(path))
+
+    return max(50.0, 4 * size / 2**20)
+
+
+class MemoryBudget:
+    """
+    Admits stages while the sum of their estimated memory fits in budget_mb.
+    A stage estimated above the whole budget runs once nothing else does.
+    """
+
+    def __init__(self, budget_mb: float):
+        self.budget_mb = budget_mb
+        self.used_mb = 0.0
+        self._changed = asyncio.Condition()
+
+    async def acquire(self, mb: float):
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.used_mb == 0 or self.used_mb + mb <= self.budget_mb)
+            self.used_mb += mb
+
+    async def release(self, mb: float):
+        async with self._changed:
+            self.used_mb -= mb
+            self._changed.notify_all()
+
+
+def run_dag(names=None, force=False, workers=None, memory_budget_mb: float = 2048, trace: str = None) -> dict:
+    """
+    Run the pipeline as a dependency graph (raw files -> clean_* -> fig*)
+    on an asyncio scheduler. Each stage starts as soon as the stages writing
+    its inputs are done, so a figure renders while unrelated cleaning is
+    still running. Cleaning runs on a thread pool (it is mostly file
+    reading), figures on a process pool. Fresh stages are reused as in
+    run_pipeline.
+
+    Parameters:
+    - names: stage names to consider, defaults to all
+    - force: rebuild the selected stages even if they are fresh
+    - workers: size of each pool, defaults to one per CPU
+    - memory_budget_mb: cap on the summed memory_estimate_mb of the stages
+      running at once
+    - trace: path to write per-stage timing and memory spans to
+
+    Prints the critical path, the chain of stages that bounded the run time.
+
+    Returns a dict of stage name -> "reused", "rebuilt", "failed" or
+    "skipped" (an upstream stage failed).
+    """
+    start = time.perf_counter()
+    if trace is not None:
+        instrument.start_run()
+    stages = pipeline_stages()
+    if names is not None:
+        stages = [stage for stage in stages if stage.name in names]
+
+    status, timings = asyncio.run(_schedule(stages, force, workers, memory_budget_mb, instrument.run_origin()))
+
+    for state in ("reused", "rebuilt", "failed", "skipped"):
+        stage_names = [name for name, value in status.items() if value == state]
+        if stage_names:
+            print(f"{state} ({len(stage_names)}): {', '.join(stage_names)}")
+    path = critical_path(stage_graph(stages), timings)
+    if path:
+        steps = " -> ".join(f"{name} {timings[name][1] - timings[name][0]:.2f}s" for name in path)
+        print(f"Critical path: {steps}")
+    print(f"Pipeline finished in {time.perf_counter() - start:.2f}s")
+
+    if trace is not None:
+        instrument.summarize(instrument.finish_run(trace))
+        print(f"Stage timings written to {trace}")
+
+    return status
+
+
+def critical_path(graph: dict, timings: dict) -> list:
+    """
+    Stage names from the first to the last to finish, following at each
+    step back the input stage that finished last.
+
+    Parameters:
+    - graph: as returned by stage_graph
+    - timings: stage name -> (start, end) of the stages that ran
+    """
+    if not timings:
+        return []
+
+    name = max(timings, key=lambda name: timings[name][1])
+    path = [name]
+    while True:
+        ran = [dep for dep in graph[name] if dep in timings]
+        if not ran:
+            break
+        name = max(ran, key=lambda dep: timings[dep][1])
+        path.append(name)
+
+    return path[::-1]
+
+
+async def _schedule(stages: list, force: bool, workers: int, memory_budget_mb: float, origin: float = None):
+    graph = stage_graph(stages)
+    cache = BuildCache(cache_path())
+    budget = MemoryBudget(memory_budget_mb)
+    loop = asyncio.get_running_loop()
+    finished = {stage.name: asyncio.Event() for stage in stages}
+    status = {}
+    timings = {}
+    t0 = time.perf_counter()
+
+    # the figure workers must not be forked: the stage threads may hold locks
+    # (the manifest's, the loader cache's) at the moment of the fork
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    with ThreadPoolExecutor(max_workers=workers) as threads, ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(start_method),
+        initializer=plotting._init_worker,
+        initargs=(env.DATA_PATH, env.REPO_PATH),
+    ) as processes:
+
+        async def run(stage: Stage):
+            for dep in graph[stage.name]:
+                await finished[dep].wait()
+            if any(status[dep] in ("failed", "skipped") for dep in graph[stage.name]):
+                status[stage.name] = "skipped"
+                finished[stage.name].set()
+                return
+
+            fingerprint = cache.fingerprint(stage.inputs, stage.funcs)
+            if not force and cache.is_fresh(stage.name, fingerprint):
+                status[stage.name] = "reused"
+                finished[stage.name].set()
+                return
+
+            mb = memory_estimate_mb(stage)
+            await budget.acquire(mb)
+            try:
+                if stage.name in plotting.FIGURES:
+                    result = await loop.run_in_executor(processes, plotting._render_figure, stage.name, origin)
+                    instrument.add_events(result.pop("events", []))
+                else:
+                    result = await loop.run_in_executor(threads, _run_timed, stage.run)
+            finally:
+                await budget.release(mb)
+            # time spent running, not queued for a free worker
+            ended = time.perf_counter() - t0
+            timings[stage.name] = (ended - result["seconds"], ended)
+            error = result["error"]
+
+            if error is None:
+                cache.record(stage.name, fingerprint, stage.outputs)
+                status[stage.name] = "rebuilt"
+            else:
+                print(f"{stage.name} failed: {error}")
+                status[stage.name] = "failed"
+            finished[stage.name].set()
+
+        await asyncio.gather(*(run(stage) for stage in stages))
+
+    cache.save()
+
+    return {stage.name: status[stage.name] for stage in stages}, timings
+
+
+def watch(names=None, interval: float = 0.5):
+    """
+    Keep this process (imports, fonts, parsed inputs) warm and rebuild
+    stages as their inputs change, until interrupted.
+
+    The stages' input files, the raw data_path files (yearly exports as
+    listed in the input manifest) and the clean/ files the figures read, are
+    polled every interval seconds. A
+    change reruns the stages reading that file and everything downstream of
+    them, in this process, so a saved CSV turns into an updated PNG without
+    starting Python again.
+
+    Parameters:
+    - names: stage names to watch, defaults to all
+    - interval: seconds between polls
+    """
+    plotting._warm_up()
+    stages = _watched_stages(names)
+    graph = stage_graph(stages)
+
+    run_pipeline([stage.name for stage in stages], workers=1)
+    seen = _snapshot(stages)
+    print(f"Watching {len(seen)} files every {interval}s, Ctrl-C to stop")
+
+    try:
+        while True:
+            time.sleep(interval)
+            # re-listed from the manifest so yearly files added since are
+            # watched; a removed file is matched against the previous listing
+            previous, stages = stages, _watched_stages(names)
+            current = _snapshot(stages)
+            changed = {path for path in seen.keys() | current.keys() if seen.get(path) != current.get(path)}
+            if not changed:
+                continue
+
+            print(f"Changed: {', '.join(os.path.basename(path) for path in sorted(changed))}")
+            affected = {*affected_stages(previous, graph, changed), *affected_stages(stages, graph, changed)}
+            affected = [stage.name for stage in stages if stage.name in affected]
+            if affected:
+                run_pipeline(affected, workers=1)
+
+            # our own writes to clean/ are not changes to react to; anything
+            # else edited while the stages ran is picked up on the next poll
+            written = {path for stage in stages if stage.name in affected for path in stage.outputs}
+            seen = {**current, **{path: state for path, state in _snapshot(stages).items() if path in written}}
+    except KeyboardInterrupt:
+        print("Stopped watching")
+
+
+def affected_stages(stages: list, graph: dict, changed) -> list:
+    """
+    Names of the stages reading any of the changed paths, directly or inside
+    an input directory, plus every stage downstream of them, in pipeline
+    order.
+    """
+    changed = {os.path.abspath(path) for path in changed}
+    affected = {
+        stage.name
+        for stage in stages
+        for path in map(os.path.abspath, stage.inputs)
+        if any(other == path or other.startswith(path + os.sep) for other in changed)
+    }
+
+    readers = {name: [other for other, deps in graph.items() if name in deps] for name in graph}
+    pending = list(affected)
+    while pending:
+        for reader in readers[pending.pop()]:
+            if reader not in affected:
+                affected.add(reader)
+                pending.append(reader)
+
+    return [stage.name for stage in stages if stage.name in affected]
+
+
+def _watched_stages(names) -> list:
+    stages = pipeline_stages()
+    if names is not None:
+        stages = [stage for stage in stages if stage.name in names]
+
+    return stages
+
+
+def _snapshot(stages: list) -> dict:
+    states = {}
+    for path in expand_paths({path for stage in stages for path in stage.inputs}):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        states[path] = (stat.st_mtime_ns, stat.st_size)
+
+    return states
+
+
+def _run_timed(func) -> dict:
+    start = time.perf_counter()
+    error = None
+    try:
+        func()
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+
+    return {"seconds": time.perf_counter() - start, "error": error}
+
+
+def _run_stage(cache: BuildCache, stage: Stage, force: bool) -> str:
+    fingerprint = cache.fingerprint(stage.inputs, stage.funcs)
+    if not force and cache.is_fresh(stage.name, fingerprint):
+        return "reused"
+
+    try:
+        stage.run()
+    except Exception as exc:
+        print(f"{stage.name} failed: {type(exc).__name__}: {exc}")
+        return "failed"
+
+    cache.record(stage.name, fingerprint, stage.outputs)
+
+    return "rebuilt"
+
+
+def _run_with_handoff(cache: BuildCache, stage: Stage, force: bool, figures: list) -> dict:
+    """
+    Run a clean stage without waiting for its CSV and draw the figures that
+    read that CSV from the frame it returned in the meantime. The cache
+    entries are recorded once the CSV is on disk.
+    """
+    fingerprint = cache.fingerprint(stage.inputs, stage.funcs)
+    if not force and cache.is_fresh(stage.name, fingerprint):
+        return {stage.name: "reused"}
+
+    try:
+        frame = stage.run(wait=False)
+    except Exception as exc:
+        print(f"{stage.name} failed: {type(exc).__name__}: {exc}")
+        return {stage.name: "failed"}
+
+    status = {}
+    for figure in figures:
+        try:
+            plotting.FIGURES[figure.name](df=frame, save=True)
+            status[figure.name] = "rebuilt"
+        except Exception as exc:
+            print(f"{figure.name} failed: {type(exc).__name__}: {exc}")
+            status[figure.name] = "failed"
+
+    try:
+        artifacts.wait_for_writes()
+    except Exception as exc:
+        print(f"{stage.name} failed: {type(exc).__name__}: {exc}")
+        return {stage.name: "failed", **{figure.name: "failed" for figure in figures}}
+
+    cache.record(stage.name, fingerprint, stage.outputs)
+    for figure in figures:
+        if status[figure.name] == "rebuilt":
+            cache.record(figure.name, cache.fingerprint(figure.inputs, figure.funcs), figure.outputs)
+
+    return {stage.name: "rebuilt", **status}
+
+
+if __name__ == "__main__":
+    run_pipeline()
@@ -1,16 +1,38 @@
+import io
 import os
 import textwrap
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import lru_cache, partial
+from typing import Callable, NamedTuple
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
 from matplotlib.ticker import PercentFormatter
+from matplotlib.transforms import Bbox
 from pandas.plotting import register_matplotlib_converters
+from PIL import Image
 
 register_matplotlib_converters()
 
+from util.cache import write_if_changed
+from util import env
 from util.env import data_path, repo_path
+from util.loader import read_frame
+from util.instrument import (
+    add_events,
+    count,
+    finish_run,
+    run_origin,
+    stage,
+    start_run,
+)
 
 
 def out_path(*args):
@@ -21,588 +43,732 @@ def processed_data_path(*args):
     return repo_path("clean", *args)
 
 
-def set_properties():
+# project matplotlib style, applied per figure by plot_style()
+PLOT_STYLE = {
+    # "font.family": "Malgun Gothic",
+    "legend.handlelength": 1,
+    "legend.fontsize": 10,
+    "xtick.labelsize": 12,
+    "ytick.labelsize": 12,
+    "figure.titlesize": 18,
+    "axes.titlesize": 14,
+    "axes.titlepad": 20,
+    "axes.axisbelow": True,
+    # fixed ids in SVG output so identical figures give identical files
+    "svg.hashsalt": "youth-prtf",
+}
+
+# drop the matplotlib version and timestamps so a re-render of an unchanged
+# figure is byte-identical to the file already in out/
+SAVE_METADATA = {
+    "png": {"Software": None},
+    "svg": {"Date": None, "Creator": None},
+    "pdf": {"CreationDate": None, "Creator": None, "Producer": None},
+}
+
+
+class RenderProfile(NamedTuple):
     """
-    sets matplotlib formatting properties
+    How figures are written out.
+
+    - dpi: output resolution
+    - tight: crop to the drawn content, which costs one extra full draw;
+      otherwise crop to the figure plus a fixed margin (DRAFT_MARGIN)
+    - compress_level: zlib level for the PNG (0-9), None for the default
+    - palette: quantize PNGs to at most this many colours, which suits the
+      flat-colour charts and makes the files several times smaller
+    - subdir: folder under out/ the files go to
     """
-    # mpl.rcParams['font.family'] = 'Malgun Gothic'
-    mpl.rcParams["legend.handlelength"] = 1
-    mpl.rcParams["legend.fontsize"] = 10
-    mpl.rcParams["xtick.labelsize"] = 12
-    mpl.rcParams["ytick.labelsize"] = 12
-    mpl.rcParams["figure.titlesize"] = 18
-    mpl.rcParams["axes.titlesize"] = 14
-    mpl.rcParams["axes.titlepad"] = 20
-    mpl.rcParams["axes.axisbelow"] = True
-
-
-def style_plot_axes(fig, ax):
-
-    ax.spines["top"].set_visible(False)
-    ax.spines["right"].set_visible(False)
-    ax.spines["left"].set_visible(False)
-
-    ax.yaxis.grid(True, alpha=0.3, zorder=1, color="#d4d2d2")
-    ax.yaxis.set_tick_params(left=False)
-
-    fig.set_facecolor("#e8ecfc")
-    ax.set_facecolor("#e8ecfc")
-
-    return fig, ax
-
-
-def plot_fig3(df: pd.DataFrame = None, save=False):
-    if df is None:
-        df = pd.read_excel(data_path("youth-rtc", "fig3.xlsx"))
-
-    set_properties()
-
-    fig, ax = plt.subplots(figsize=(10, 6))
 
-    fig, ax = style_plot_axes(fig, ax)
-    ax.spines["bottom"].set_color("#aeb0b7")
+    dpi: int
+    tight: bool
+    compress_level: int = None
+    palette: int = None
+    subdir: str = ""
 
-    years = df.columns[1:]  # Exclude 1st col which represents 'year' label
-    values = df.iloc[0, 1:].values  # Exclude 1st val which represents 'count' label
 
-    ax.plot(years, values, color="#2c48dc")
+RENDER_PROFILES = {
+    "publication": RenderProfile(dpi=300, tight=True),
+    # for iterating on wording and limits: same specs, a fraction of the work
+    "draft": RenderProfile(dpi=72, tight=False, compress_level=1, subdir="draft"),
+    # publication layout and resolution, palette PNGs for the web
+    "web": RenderProfile(dpi=300, tight=True, compress_level=9, palette=256, subdir="web"),
+}
 
-    title = "Total psychiatric residential treatment facilities (PRTFs), 2010-2023"
-    source_text = "Source: Active Provider and Supplier Counts Report, Quality Certification & Oversight Reports"
-    note_text = "Note: Counts are at the national level and based on the calendar year."
-
-    ax.set_ylim(330, 420)
-    ax.set_xlim(2010, 2023)
-    ax.set_ylabel(
-        "Number of facilities", size=11, color="#aeb0b7", fontweight="bold", labelpad=10
-    )
-    ax.set_title(title, color="#20222e", fontweight="bold", loc="left")
-    fig.suptitle("Figure 3", fontsize=12, x=0.125, y=0.92)
+# margin around the figure kept by a fixed (non-tight) crop, as a fraction
+# of the figure size; covers the sources, notes and titles placed outside
+# the figure area
+DRAFT_MARGIN = (0.05, 0.25)
 
-    fig.text(
-        0.08, -0.02, source_text, ha="left", va="bottom", fontsize=11, color="#aeb0b7"
-    )
-    fig.text(
-        0.08, -0.06, note_text, ha="left", va="bottom", fontsize=11, color="#20222e"
-    )
-
-    yticks = ax.yaxis.get_major_ticks()
-    yticks[0].label1.set_visible(False)
-    plt.tight_layout(pad=2)
-
-    if save:
-        fig.savefig(
-            out_path("fig3.png"),
-            bbox_inches="tight",
-            dpi=300,
-            facecolor=fig.get_facecolor(),
-        )
-        print("Figure 3 saved in out/")
-    else:
-        plt.show()
+def set_properties():
+    """
+    sets matplotlib formatting properties globally (for interactive use; the
+    plot functions use plot_style)
+    """
+    mpl.rcParams.update(PLOT_STYLE)
 
 
-def plot_fig4(df: pd.DataFrame = None, save=False):
-    if df is None:
-        df = pd.read_csv(processed_data_path("clean_fig4_data.csv"))
+def plot_style():
+    """
+    Context manager applying PLOT_STYLE for the enclosed block and restoring
+    the previous rcParams afterwards (mpl.rc_context).
+    """
+    return mpl.rc_context(PLOT_STYLE)
 
-    set_properties()
 
-    fig, ax = plt.subplots(figsize=(14, 6))
+@contextmanager
+def new_figure(figsize, show=False):
+    """
+    Yield (fig, ax) for a single-axes figure built in the project style.
 
-    fig, ax = style_plot_axes(fig, ax)
-    ax.spines["top"].set_color("#aeb0b7")
-    ax.spines["bottom"].set_visible(False)
+    Figures are created directly on an Agg canvas, outside pyplot, so no
+    global figure state is touched and the figure is released on exit. With
+    show=True the figure goes through pyplot instead and is shown on exit.
+    """
+    with plot_style():
+        if show:
+            fig = plt.figure(figsize=figsize)
+        else:
+            fig = Figure(figsize=figsize)
+            FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        try:
+            yield fig, ax
+            if show:
+                plt.show()
+        finally:
+            if show:
+                plt.close(fig)
+            else:
+                fig.clear()
 
-    ax.bar(df["state"], df["pct_chg"], color="#2c48dc")
 
-    title = "Declines in psychiatric residential treatment facilities (PRTFs), select states, 2010-2023"
-    source_text = "Source: Active Provider and Supplier Counts Report, Quality Certification & Oversight Reports"
-    note_text = (
-        "Note: Percent change based on total beds per calendar year in 2010 and 2023."
-    )
+def style_plot_axes(fig, ax):
 
-    ax.set_ylabel(
-        "Percent change (2010 to 2023)",
-        size=11,
-        color="#aeb0b7",
-        fontweight="bold",
-        labelpad=10,
-    )
-    ax.set_title(title, color="#20222e", fontweight="bold", loc="left")
-    fig.suptitle("Figure 4", fontsize=12, x=0.15, y=1.165)
+    ax.spines["top"].set_visible(False)
+    ax.spines["right"].set_visible(False)
+    ax.spines["left"].set_visible(False)
 
-    fig.text(
-        0.13, -0.01, source_text, ha="left", va="bottom", fontsize=11, color="#aeb0b7"
-    )
-    fig.text(
-        0.13, -0.05, note_text, ha="left", va="bottom", fontsize=11, color="#20222e"
-    )
+    ax.yaxis.grid(True, alpha=0.3, zorder=1, color="#d4d2d2")
+    ax.yaxis.set_tick_params(left=False)
 
-    ax.set_xticks(range(len(df["state"])))
-    ax.set_xticklabels(df["state"], rotation=45, ha="left")
+    fig.set_facecolor("#e8ecfc")
+    ax.set_facecolor("#e8ecfc")
 
-    ax.xaxis.tick_top()
-    ax.xaxis.set_label_position("top")
+    return fig, ax
 
-    # ax.set_ylim(0, -0.90)
-    ax.yaxis.set_major_formatter(PercentFormatter(100))
 
-    if save:
-        fig.savefig(
-            out_path("fig4.png"),
-            bbox_inches="tight",
-            dpi=300,
-            facecolor=fig.get_facecolor(),
-        )
-        print("Figure 4 saved in out/")
+def save_figure(fig, filename: str, profile: str = "publication", formats=("png",), report=None) -> dict:
+    """
+    Save fig to out/ (or the profile's folder under it) in each of formats
+    from a single layout: the bounding box is worked out once and shared by
+    every format. The publication profile crops to a tight bounding box;
+    the draw, the tight bbox pass and each encode are timed as separate
+    stages.
+
+    Parameters:
+    - fig: Figure
+    - filename: str, file name in out/; its extension is replaced per format
+    - profile: key of RENDER_PROFILES
+    - formats: iterable of matplotlib formats, e.g. ("png", "svg", "pdf")
+    - report: optional open PdfPages the figure is also added to as a page
+
+    Files whose contents would not change are left untouched.
+
+    Returns a dict of path -> whether the file was (re)written.
+    """
+    profile = RENDER_PROFILES[profile]
+    canvas = fig.canvas
+
+    if profile.tight:
+        saved_dpi = fig.dpi
+        fig.dpi = profile.dpi
+        try:
+            with stage("draw", "plot"):
+                canvas.draw()
+            with stage("tight_bbox", "plot"):
+                bbox = fig.get_tightbbox(canvas.get_renderer())
+                bbox = bbox.padded(mpl.rcParams["savefig.pad_inches"])
+        finally:
+            fig.dpi = saved_dpi
     else:
-        plt.show()
-
-
-def plot_fig5(df: pd.DataFrame = None, save=False):
-    if df is None:
-        df = pd.read_csv(data_path("youth-rtc", "fig5.csv"))
-
-    set_properties()
-
-    fig, ax = plt.subplots(figsize=(10, 6))
-
-    fig, ax = style_plot_axes(fig, ax)
-    ax.spines["bottom"].set_color("#aeb0b7")
-
-    years = df.columns[1:].astype(str)
-    values = df.iloc[0, 1:].values
-
-    ax.bar(years, values, color="#2c48dc")
-    source_wrapper = textwrap.TextWrapper(width=93)
-    title = "Number of Residential Treatment Centers for Children, 2010-2022"
-    source_text = "Source: Substance Abuse and Mental Health Services Administration, National Mental Health Services Survey (N-MHSS): 2010, 2012, 2014, 2015, 2016, 2017, 2018, 2019, 2020, 2021; Substance Abuse and Mental Health ServicesAdministration, National Substance Use and Mental Health Services Survey (N-SUMHSS) 2022. Retrieved from https://www.samhsa.gov/data/. "
-    wrapped_source = source_wrapper.fill(text=source_text)
-    note_text = (
-        "Note: Counts represent total number of facilities (inpatient and residential)."
-    )
+        width, height = fig.get_size_inches()
+        x, y = DRAFT_MARGIN
+        bbox = Bbox.from_extents(-x * width, -y * height, (1 + x) * width, (1 + y) * height)
+
+    os.makedirs(out_path(profile.subdir), exist_ok=True)
+    stem = os.path.splitext(filename)[0]
+    written = {}
+
+    for fmt in formats:
+        options = {}
+        if fmt == "png" and profile.compress_level is not None and not profile.palette:
+            options["pil_kwargs"] = {"compress_level": profile.compress_level}
+        path = out_path(profile.subdir, f"{stem}.{fmt}")
+        with stage("encode" if fmt == "png" else f"encode_{fmt}", "plot"):
+            buffer = io.BytesIO()
+            fig.savefig(
+                buffer,
+                format=fmt,
+                bbox_inches=bbox,
+                dpi=profile.dpi,
+                facecolor=fig.get_facecolor(),
+                metadata=SAVE_METADATA.get(fmt),
+                **options,
+            )
+            data = buffer.getvalue()
+            if fmt == "png" and profile.palette:
+                data = quantize_png(data, profile.palette, profile.compress_level)
+            written[path] = write_if_changed(path, data)
+
+    if report is not None:
+        with stage("encode_report", "plot"):
+            report.savefig(fig, bbox_inches=bbox, facecolor=fig.get_facecolor())
+
+    return written
+
+
+def quantize_png(data: bytes, colors: int = 256, compress_level: int = None) -> bytes:
+    """
+    Re-encode a PNG as a palette image of at most colors colours. The
+    original is kept if quantizing does not make it smaller.
+    """
+    image = Image.open(io.BytesIO(data)).convert("RGB")
+    buffer = io.BytesIO()
+    image.quantize(colors).save(buffer, format="png", compress_level=compress_level or 9)
 
-    ax.set_ylim(0, 900)
-    ax.set_ylabel("Number of facilities (in thousands)")
-    ax.set_title(title, color="#20222e", fontweight="bold", loc="left")
-    fig.suptitle("Figure 5", fontsize=12, x=0.155, y=0.99)
+    return min(data, buffer.getvalue(), key=len)
 
-    fig.text(
-        0.13, 0.08, wrapped_source, ha="left", va="bottom", fontsize=10, color="#aeb0b7"
-    )
-    fig.text(
-        0.13, 0.045, note_text, ha="left", va="bottom", fontsize=10, color="#20222e"
-    )
 
-    xticks = ax.yaxis.get_major_ticks()
-    xticks[0].label1.set_visible(False)
+def figure_path(name: str, profile: str = "publication", fmt: str = "png") -> str:
+    return out_path(RENDER_PROFILES[profile].subdir, f"{name}.{fmt}")
 
-    plt.subplots_adjust(bottom=0.25)
-    # plt.tight_layout(pad=3, rect=[0, 0.3, 1, 1])
-
-    if save:
-        fig.savefig(
-            out_path("fig5.png"),
-            bbox_inches="tight",
-            dpi=300,
-            facecolor=fig.get_facecolor(),
-        )
-        print("Figure 5 saved in out/")
-    else:
-        plt.show()
 
+# chart colours
+BLUE = "#2c48dc"
+ORANGE = "#ff8000"
+GREY = "#aeb0b7"
+DARK = "#20222e"
 
-def plot_fig6(df: pd.DataFrame = None, save=False):
-    if df is None:
-        df = pd.read_csv(data_path("youth-rtc", "figs6and7.csv"), index_col=0)
+QCOR_SOURCE = "Source: Active Provider and Supplier Counts Report, Quality Certification & Oversight Reports"
+NMHSS_SOURCE = "Source: Substance Abuse and Mental Health Services Administration, National Mental Health Services Survey (N-MHSS): {years}; Substance Abuse and Mental Health ServicesAdministration, National Substance Use and Mental Health Services Survey (N-SUMHSS) 2022. Retrieved from https://www.samhsa.gov/data/. "
 
-    values = df.loc["beds", :].str.replace(",", "").astype(int) / 1000
-    years = np.arange(len(values))
+# figure inputs: key -> (function returning the path, reader, reader options)
+INPUTS = {
+    "fig3": (lambda: data_path("youth-rtc", "fig3.xlsx"), pd.read_excel, {}),
+    "clean_fig4": (lambda: processed_data_path("clean_fig4_data.csv"), pd.read_csv, {}),
+    "fig5": (lambda: data_path("youth-rtc", "fig5.csv"), pd.read_csv, {}),
+    "figs6and7": (lambda: data_path("youth-rtc", "figs6and7.csv"), pd.read_csv, {"index_col": 0}),
+    "clean_fig8": (lambda: processed_data_path("clean_fig8_data.csv"), pd.read_csv, {}),
+    "clean_fig9": (lambda: processed_data_path("clean_fig9_data.csv"), pd.read_csv, {}),
+    "clean_fig10": (lambda: processed_data_path("clean_fig10_data.csv"), pd.read_csv, {}),
+    "fig11": (lambda: data_path("youth-rtc", "fig11.csv"), pd.read_csv, {}),
+}
 
-    set_properties()
 
-    fig, ax = plt.subplots(figsize=(10, 5))
+class Series(NamedTuple):
+    """
+    One plotted series. x and y take the prepared frame and return values;
+    kind is "line", "bar" or "trend" (a dashed least-squares line).
+    """
 
-    fig, ax = style_plot_axes(fig, ax)
+    kind: str
+    x: Callable
+    y: Callable
+    color: str = BLUE
+    label: str = None
 
-    ax.bar(years, values, color="#2c48dc")
-    ax.spines["bottom"].set_color("#aeb0b7")
 
-    z = np.polyfit(years, values, 1)
-    p = np.poly1d(z)
-    plt.plot(years, p(years), "--", color="#ff8000")
+class Text(NamedTuple):
+    """
+    A source or note line placed in figure coordinates, wrapped to width
+    characters when width is set.
+    """
 
-    plt.xticks(years, labels=df.columns)
+    text: str
+    x: float
+    y: float
+    width: int = None
+    fontsize: int = 11
 
-    source_wrapper = textwrap.TextWrapper(width=97)
-    title = "Number of beds in Residential Treatment Centers for Children, 2010-2022"
-    source_text = "Source: Substance Abuse and Mental Health Services Administration, National Mental Health Services Survey (N-MHSS): 2010, 2014, 2016, 2018, 2020, 2021; Substance Abuse and Mental Health ServicesAdministration, National Substance Use and Mental Health Services Survey (N-SUMHSS) 2022. Retrieved from https://www.samhsa.gov/data/. "
-    wrapped_source = source_wrapper.fill(text=source_text)
-    note_text = "Note: Counts represent total beds (inpatient and residential) across facilities."
 
-    ax.set_ylim(0, None)
-    ax.set_ylabel("Number of Beds (in thousands)")
-    ax.set_title(title, color="#20222e", fontweight="bold", loc="left")
-    fig.suptitle("Figure 6", fontsize=12, x=0.16, y=0.999)
+class FigureSpec(NamedTuple):
+    """
+    Everything that distinguishes one report figure from another; rendered
+    by render_figure.
+
+    - input: key of INPUTS the figure is drawn from
+    - prepare: takes the input frame and returns the frame the series read
+    - suptitle_xy: position of the "Figure N" label
+    - ylabel_emphasis: grey bold y label rather than the default style
+    - bottom_spine: "grey" or "hidden" (which also greys the top spine)
+    - xticklabels: takes the frame and returns labels for ticks at 0..n-1
+    - layout: ("adjust", kwargs) / ("tight", kwargs) steps run in order
+    - customize: extra callable(fig, ax, df) for one-off tweaks
+    """
 
-    fig.text(
-        0.13,
-        0.045,
-        wrapped_source,
-        ha="left",
-        va="bottom",
-        fontsize=10,
-        color="#aeb0b7",
-    )
-    fig.text(
-        0.13, 0.01, note_text, ha="left", va="bottom", fontsize=10, color="#20222e"
-    )
+    number: int
+    input: str
+    figsize: tuple
+    series: tuple
+    title: str
+    suptitle_xy: tuple
+    source: Text
+    note: Text
+    prepare: Callable = None
+    title_width: int = None
+    ylabel: str = None
+    ylabel_emphasis: bool = True
+    xlim: tuple = None
+    ylim: tuple = None
+    bottom_spine: str = "grey"
+    hide_first_ytick: bool = True
+    xticklabels: Callable = None
+    legend: bool = False
+    layout: tuple = ()
+    customize: Callable = None
+
+    @property
+    def name(self) -> str:
+        return f"fig{self.number}"
+
+
+def input_path(key: str) -> str:
+    return INPUTS[key][0]()
+
+
+def read_input(key: str) -> pd.DataFrame:
+    """
+    Read a figure input through the shared loader, so figures sharing an
+    input (fig6 and fig7) reuse one parse. The frame is read-only.
+    """
+    path, reader, options = INPUTS[key]
 
-    xticks = ax.yaxis.get_major_ticks()
-    xticks[0].label1.set_visible(False)
+    return read_frame(path(), reader, **options)
 
-    plt.subplots_adjust(bottom=0.26)
-    # plt.tight_layout(pad=3, rect=[0, 0.3, 1, 1])
 
-    if save:
-        fig.savefig(
-            out_path("fig6.png"),
-            bbox_inches="tight",
-            dpi=300,
-            facecolor=fig.get_facecolor(),
-        )
-        print("Figure 6 saved in out/")
-    else:
-        plt.show()
+@lru_cache(maxsize=None)
+def wrap_text(text: str, width: int = None) -> str:
+    return text if width is None else textwrap.TextWrapper(width=width).fill(text=text)
 
 
-def plot_fig7(df: pd.DataFrame = None, save=False):
+def render_figure(
+    spec: FigureSpec,
+    df: pd.DataFrame = None,
+    save=False,
+    profile: str = "publication",
+    formats=("png",),
+    report=None,
+):
+    """
+    Draw a figure from its spec, saving it to out/<name>.png when save is
+    set and showing it otherwise.
+
+    Parameters:
+    - spec: FigureSpec
+    - df: input frame, read from spec.input when not given
+    - save: bool
+    - profile: key of RENDER_PROFILES used when saving
+    - formats, report: see save_figure
+
+    Returns save_figure's dict of path -> whether it was (re)written, or
+    None when not saving.
+    """
+    written = None
     if df is None:
-        df = pd.read_csv(data_path("youth-rtc", "figs6and7.csv"), index_col=0)
-
-    values = df.loc["clients", :].str.replace(",", "").astype(int) / 1000
-    years = np.arange(len(values))
-
-    set_properties()
-
-    fig, ax = plt.subplots(figsize=(10, 5))
+        df = read_input(spec.input)
+    if spec.prepare is not None:
+        df = spec.prepare(df)
+
+    count(rows_read=len(df))
+    with new_figure(spec.figsize, show=not save) as (fig, ax):
+        style_plot_axes(fig, ax)
+        if spec.bottom_spine == "hidden":
+            ax.spines["top"].set_color(GREY)
+            ax.spines["bottom"].set_visible(False)
+        else:
+            ax.spines["bottom"].set_color(GREY)
+
+        for series in spec.series:
+            x, y = series.x(df), series.y(df)
+            if series.kind == "bar":
+                ax.bar(x, y, color=series.color, label=series.label)
+            elif series.kind == "trend":
+                ax.plot(x, np.poly1d(np.polyfit(x, y, 1))(x), "--", color=series.color)
+            else:
+                ax.plot(x, y, color=series.color, label=series.label)
+
+        if spec.xticklabels is not None:
+            labels = spec.xticklabels(df)
+            ax.set_xticks(np.arange(len(labels)), labels=labels)
+        if spec.ylim is not None:
+            ax.set_ylim(*spec.ylim)
+        if spec.xlim is not None:
+            ax.set_xlim(*spec.xlim)
+        if spec.ylabel_emphasis:
+            ax.set_ylabel(spec.ylabel, size=11, color=GREY, fontweight="bold", labelpad=10)
+        else:
+            ax.set_ylabel(spec.ylabel)
+        ax.set_title(wrap_text(spec.title, spec.title_width), color=DARK, fontweight="bold", loc="left")
+        x, y = spec.suptitle_xy
+        fig.suptitle(f"Figure {spec.number}", fontsize=12, x=x, y=y)
+
+        for text, color in ((spec.source, GREY), (spec.note, DARK)):
+            fig.text(
+                text.x,
+                text.y,
+                wrap_text(text.text, text.width),
+                ha="left",
+                va="bottom",
+                fontsize=text.fontsize,
+                color=color,
+            )
+
+        if spec.legend:
+            ax.legend(frameon=False)
+        if spec.customize is not None:
+            spec.customize(fig, ax, df)
+        if spec.hide_first_ytick:
+            ax.yaxis.get_major_ticks()[0].label1.set_visible(False)
+
+        for step, kwargs in spec.layout:
+            if step == "tight":
+                fig.tight_layout(**kwargs)
+            else:
+                fig.subplots_adjust(**kwargs)
+
+        if save:
+            written = save_figure(fig, f"{spec.name}.png", profile, formats, report)
+            folder = os.path.join("out", RENDER_PROFILES[profile].subdir, "")
+            state = "saved in" if any(written.values()) else "unchanged in"
+            print(f"Figure {spec.number} {state} {folder}")
+
+    return written
+
+
+def plot_figure(name: str, df: pd.DataFrame = None, save=False, **options):
+    """
+    Render a figure from FIGURE_SPECS; options (profile, formats, report)
+    are passed on to render_figure.
+    """
+    with stage(f"plot_{name}"):
+        return render_figure(FIGURE_SPECS[name], df, save, **options)
 
-    fig, ax = style_plot_axes(fig, ax)
 
-    ax.bar(years, values, color="#2c48dc")
-    ax.spines["bottom"].set_color("#aeb0b7")
+def figures_for_inputs(paths) -> list:
+    """
+    Names of the figures drawn from any of the given input paths.
+    """
+    paths = {os.path.abspath(path) for path in paths}
 
-    z = np.polyfit(years, values, 1)
-    p = np.poly1d(z)
-    plt.plot(years, p(years), "--", color="#ff8000")
+    return [
+        name
+        for name, spec in FIGURE_SPECS.items()
+        if os.path.abspath(input_path(spec.input)) in paths
+    ]
 
-    plt.xticks(years, labels=df.columns)
 
-    source_wrapper = textwrap.TextWrapper(width=98)
-    title = "Number of clients served in Residential Treatment Centers for Children, \n2010-2022"
-    source_text = "Source: Substance Abuse and Mental Health Services Administration, National Mental Health Services Survey (N-MHSS): 2010, 2014, 2016, 2018, 2020, 2021; Substance Abuse and Mental Health ServicesAdministration, National Substance Use and Mental Health Services Survey (N-SUMHSS) 2022. Retrieved from https://www.samhsa.gov/data/. "
-    wrapped_source = source_wrapper.fill(text=source_text)
-    note_text = "Note: Counts represent total clients served (inpatient and residential) across facilities."
+def _years(values: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    return pd.to_datetime(values.astype(str), format="%Y")
 
-    ax.set_ylim(0, 50)
-    ax.set_ylabel("Number of Clients (in thousands)")
-    ax.set_title(title, color="#20222e", fontweight="bold", loc="left")
-    fig.suptitle("Figure 7", fontsize=12, x=0.156, y=0.999)
 
-    fig.text(
-        0.13,
-        0.045,
-        wrapped_source,
-        ha="left",
-        va="bottom",
-        fontsize=10,
-        color="#aeb0b7",
-    )
-    fig.text(
-        0.13, 0.01, note_text, ha="left", va="bottom", fontsize=10, color="#20222e"
-    )
+def _numbers(values: pd.Series) -> pd.Series:
+    if pd.api.types.is_string_dtype(values):
+        return values.str.replace(",", "").astype(int)
+    return values
 
-    xticks = ax.yaxis.get_major_ticks()
-    xticks[0].label1.set_visible(False)
-
-    plt.subplots_adjust(bottom=0.23, top=0.83)
-    # plt.subplots_adjust(bottom=0.26)
-    # plt.tight_layout(rect=[0, 0.1, 1, 1])
-
-    if save:
-        fig.savefig(
-            out_path("fig7.png"),
-            bbox_inches="tight",
-            dpi=300,
-            facecolor=fig.get_facecolor(),
-        )
-        print("Figure 7 saved in out/")
-    else:
-        plt.show()
 
+def _first_row(df: pd.DataFrame):
+    # 1st column holds the row label ('year'/'count'), the rest are years
+    return df.iloc[0, 1:].values
 
-def plot_fig8(df: pd.DataFrame = None, save=False):
-    if df is None:
-        df = pd.read_csv(processed_data_path("clean_fig8_data.csv"))
-
-    df["Year"] = pd.to_datetime(df["Year"], format="%Y")
-    df["Count"] = df["Count"].str.replace(",", "").astype(int)
-
-    set_properties()
-
-    fig, ax = plt.subplots(figsize=(10, 6))
-
-    fig, ax = style_plot_axes(fig, ax)
-    ax.spines["bottom"].set_color("#aeb0b7")
-
-    ax.plot(df["Year"], df["Count"], color="#2c48dc")
-
-    wrapper1 = textwrap.TextWrapper(width=110)
-    wrapper2 = textwrap.TextWrapper(width=100)
-
-    title = "Suicides, youth ages 14-18, 2001-2021"
-    source_text = "Source: Center for Disease Control and Prevention's WISQARS Leading Cause of Death Visualization Tool"
-    wrapped_source = wrapper1.fill(text=source_text)
-    note_text = 'Note: Numbers represent United States, ICD code "Suicide", Both Sexes, All Races, All Ethnicities, 2001-2021 with No Race.'
-    wrapped_note = wrapper2.fill(text=note_text)
-    ax.set_ylim(1000, 2200)
-    ax.set_xlim("2000", "2022")
-    ax.set_ylabel("Count", size=11, color="#aeb0b7", fontweight="bold", labelpad=10)
-    ax.set_title(title, color="#20222e", fontweight="bold", loc="left")
-    fig.suptitle("Figure 8", fontsize=12, x=0.14, y=0.92)
-
-    fig.text(
-        0.10,
-        -0.02,
-        wrapped_source,
-        ha="left",
-        va="bottom",
-        fontsize=11,
-        color="#aeb0b7",
-    )
-    fig.text(
-        0.10, -0.09, wrapped_note, ha="left", va="bottom", fontsize=11, color="#20222e"
-    )
 
-    xticks = ax.yaxis.get_major_ticks()
-    xticks[0].label1.set_visible(False)
-    plt.tight_layout(pad=2)
-
-    if save:
-        fig.savefig(
-            out_path("fig8.png"),
-            bbox_inches="tight",
-            dpi=300,
-            facecolor=fig.get_facecolor(),
-        )
-        print("Figure 8 saved in out/")
-    else:
-        plt.show()
+def _nmhss_row(row: str):
+    return lambda df: pd.DataFrame({"year": df.columns, "value": _numbers(df.loc[row, :]) / 1000})
 
 
-def plot_fig9(df: pd.DataFrame = None, save=False):
-    if df is None:
-        df = pd.read_csv(processed_data_path("clean_fig9_data.csv"))
-        df["year"] = pd.to_datetime(df["year"], format="%Y")
+def _fig8(df):
+    return df.assign(Year=_years(df["Year"]), Count=_numbers(df["Count"]))
 
-    set_properties()
 
-    fig, ax = plt.subplots(figsize=(10, 6))
+def _fig11(df):
+    df = df.assign(Year=_years(df["Year"]))
+    for col in df.columns[1:]:
+        df[col] = _numbers(df[col])
+    return df
 
-    fig, ax = style_plot_axes(fig, ax)
-    ax.spines["bottom"].set_color("#aeb0b7")
 
-    ax.plot(
-        df["year"],
-        df["def_per_prtf"],
-        color="#2c48dc",
-        label="Psychiatric Residential Treatment Facilities (PRTFs)",
-    )
-    ax.plot(
-        df["year"], df["def_per_sth"], color="#ff8000", label="Acute care hospitals"
-    )
+def _fig4_axes(fig, ax, df):
+    ax.set_xticks(range(len(df["state"])))
+    ax.set_xticklabels(df["state"], rotation=45, ha="left")
 
-    title = "Average annual deficiencies per facility, by facility type, 2010-2023"
-    source_text = "Source: Active Provider and Supplier Counts Report, Quality Certification & Oversight Reports, available at https://qcor.cms.gov/main.jsp"
-    note_text = "Note: Annual averages are constructed by taking the total sum of deficiencies across survey type per calendar year divided by the total number of facilities active per calendar year."
-    note_wrapper = textwrap.TextWrapper(width=110)
-    wrapped_note = note_wrapper.fill(text=note_text)
-    wrapped_source = note_wrapper.fill(text=source_text)
+    ax.xaxis.tick_top()
+    ax.xaxis.set_label_position("top")
 
-    ax.set_title(title, color="#20222e", fontweight="bold", loc="left")
-    fig.suptitle("Figure 9", fontsize=12, x=0.125, y=0.91)
+    ax.yaxis.set_major_formatter(PercentFormatter(100))
 
-    fig.text(
-        0.10, -0.03, wrapped_source, ha="left", va="bottom", fontsize=11, color="#aeb0b7"
-    )
-    fig.text(
-        0.10, -0.095, wrapped_note, ha="left", va="bottom", fontsize=11, color="#20222e"
-    )
 
-    ax.set_xlim("2010", "2023")
-    ax.set_ylim(0, None)
-    ax.set_ylabel(
-        "Average deficiencies per facility",
-        size=11,
-        color="#aeb0b7",
-        fontweight="bold",
-        labelpad=10,
+_positions = lambda df: np.arange(len(df))
+
+FIGURE_SPECS = {
+    spec.name: spec
+    for spec in (
+        FigureSpec(
+            number=3,
+            input="fig3",
+            figsize=(10, 6),
+            series=(Series("line", lambda df: df.columns[1:], _first_row),),
+            title="Total psychiatric residential treatment facilities (PRTFs), 2010-2023",
+            suptitle_xy=(0.125, 0.92),
+            source=Text(QCOR_SOURCE, 0.08, -0.02),
+            note=Text("Note: Counts are at the national level and based on the calendar year.", 0.08, -0.06),
+            ylabel="Number of facilities",
+            ylim=(330, 420),
+            xlim=(2010, 2023),
+            layout=(("tight", {"pad": 2}),),
+        ),
+        FigureSpec(
+            number=4,
+            input="clean_fig4",
+            figsize=(14, 6),
+            series=(Series("bar", lambda df: df["state"], lambda df: df["pct_chg"]),),
+            title="Declines in psychiatric residential treatment facilities (PRTFs), select states, 2010-2023",
+            suptitle_xy=(0.15, 1.165),
+            source=Text(QCOR_SOURCE, 0.13, -0.01),
+            note=Text("Note: Percent change based on total beds per calendar year in 2010 and 2023.", 0.13, -0.05),
+            ylabel="Percent change (2010 to 2023)",
+            bottom_spine="hidden",
+            hide_first_ytick=False,
+            customize=_fig4_axes,
+        ),
+        FigureSpec(
+            number=5,
+            input="fig5",
+            figsize=(10, 6),
+            series=(Series("bar", lambda df: df.columns[1:].astype(str), _first_row),),
+            title="Number of Residential Treatment Centers for Children, 2010-2022",
+            suptitle_xy=(0.155, 0.99),
+            source=Text(
+                NMHSS_SOURCE.format(years="2010, 2012, 2014, 2015, 2016, 2017, 2018, 2019, 2020, 2021"),
+                0.13, 0.08, width=93, fontsize=10,
+            ),
+            note=Text(
+                "Note: Counts represent total number of facilities (inpatient and residential).",
+                0.13, 0.045, fontsize=10,
+            ),
+            ylabel="Number of facilities (in thousands)",
+            ylabel_emphasis=False,
+            ylim=(0, 900),
+            layout=(("adjust", {"bottom": 0.25}),),
+        ),
+        FigureSpec(
+            number=6,
+            input="figs6and7",
+            prepare=_nmhss_row("beds"),
+            figsize=(10, 5),
+            series=(
+                Series("bar", _positions, lambda df: df["value"]),
+                Series("trend", _positions, lambda df: df["value"], color=ORANGE),
+            ),
+            xticklabels=lambda df: df["year"],
+            title="Number of beds in Residential Treatment Centers for Children, 2010-2022",
+            suptitle_xy=(0.16, 0.999),
+            source=Text(
+                NMHSS_SOURCE.format(years="2010, 2014, 2016, 2018, 2020, 2021"),
+                0.13, 0.045, width=97, fontsize=10,
+            ),
+            note=Text(
+                "Note: Counts represent total beds (inpatient and residential) across facilities.",
+                0.13, 0.01, fontsize=10,
+            ),
+            ylabel="Number of Beds (in thousands)",
+            ylabel_emphasis=False,
+            ylim=(0, None),
+            layout=(("adjust", {"bottom": 0.26}),),
+        ),
+        FigureSpec(
+            number=7,
+            input="figs6and7",
+            prepare=_nmhss_row("clients"),
+            figsize=(10, 5),
+            series=(
+                Series("bar", _positions, lambda df: df["value"]),
+                Series("trend", _positions, lambda df: df["value"], color=ORANGE),
+            ),
+            xticklabels=lambda df: df["year"],
+            title="Number of clients served in Residential Treatment Centers for Children, \n2010-2022",
+            suptitle_xy=(0.156, 0.999),
+            source=Text(
+                NMHSS_SOURCE.format(years="2010, 2014, 2016, 2018, 2020, 2021"),
+                0.13, 0.045, width=98, fontsize=10,
+            ),
+            note=Text(
+                "Note: Counts represent total clients served (inpatient and residential) across facilities.",
+                0.13, 0.01, fontsize=10,
+            ),
+            ylabel="Number of Clients (in thousands)",
+            ylabel_emphasis=False,
+            ylim=(0, 50),
+            layout=(("adjust", {"bottom": 0.23, "top": 0.83}),),
+        ),
+        FigureSpec(
+            number=8,
+            input="clean_fig8",
+            prepare=_fig8,
+            figsize=(10, 6),
+            series=(Series("line", lambda df: df["Year"], lambda df: df["Count"]),),
+            title="Suicides, youth ages 14-18, 2001-2021",
+            suptitle_xy=(0.14, 0.92),
+            source=Text(
+                "Source: Center for Disease Control and Prevention's WISQARS Leading Cause of Death Visualization Tool",
+                0.10, -0.02, width=110,
+            ),
+            note=Text(
+                'Note: Numbers represent United States, ICD code "Suicide", Both Sexes, All Races, All Ethnicities, 2001-2021 with No Race.',
+                0.10, -0.09, width=100,
+            ),
+            ylabel="Count",
+            ylim=(1000, 2200),
+            xlim=("2000", "2022"),
+            layout=(("tight", {"pad": 2}),),
+        ),
+        FigureSpec(
+            number=9,
+            input="clean_fig9",
+            prepare=lambda df: df.assign(year=_years(df["year"])),
+            figsize=(10, 6),
+            series=(
+                Series(
+                    "line",
+                    lambda df: df["year"],
+                    lambda df: df["def_per_prtf"],
+                    label="Psychiatric Residential Treatment Facilities (PRTFs)",
+                ),
+                Series(
+                    "line",
+                    lambda df: df["year"],
+                    lambda df: df["def_per_sth"],
+                    color=ORANGE,
+                    label="Acute care hospitals",
+                ),
+            ),
+            title="Average annual deficiencies per facility, by facility type, 2010-2023",
+            suptitle_xy=(0.125, 0.91),
+            source=Text(f"{QCOR_SOURCE}, available at https://qcor.cms.gov/main.jsp", 0.10, -0.03, width=110),
+            note=Text(
+                "Note: Annual averages are constructed by taking the total sum of deficiencies across survey type per calendar year divided by the total number of facilities active per calendar year.",
+                0.10, -0.095, width=110,
+            ),
+            ylabel="Average deficiencies per facility",
+            xlim=("2010", "2023"),
+            ylim=(0, None),
+            hide_first_ytick=False,
+            legend=True,
+            layout=(("adjust", {"bottom": 0.5}), ("tight", {"pad": 2})),
+        ),
+        FigureSpec(
+            number=10,
+            input="clean_fig10",
+            prepare=lambda df: df.assign(year=_years(df["year"])),
+            figsize=(10, 5),
+            series=(
+                Series(
+                    "line",
+                    lambda df: df["year"],
+                    lambda df: df["std_surv_tot"],
+                    label="Standard survey deficiencies",
+                ),
+                Series(
+                    "line",
+                    lambda df: df["year"],
+                    lambda df: df["comp_surv_tot"],
+                    color=ORANGE,
+                    label="Complaint survey deficiencies",
+                ),
+            ),
+            title="Psychiatric Residential Treatment Facilities (PRTFs) Standard Survey and Complaint Survey Deficiencies, 2010-2023",
+            title_width=80,
+            suptitle_xy=(0.135, 0.91),
+            source=Text(f"{QCOR_SOURCE}, available at https://qcor.cms.gov/main.jsp", 0.10, -0.015, width=110),
+            note=Text(
+                "Note: Counts represent total calendar year national violations for Conditions of Participation for PRTFs, which regulate safety. Standard surveys are those produced by federal surveyors at random. Complaint surveys are those produced by federal surveyors following a patient complaint.",
+                0.10, -0.115, width=110,
+            ),
+            ylabel="Count",
+            xlim=("2010", "2023"),
+            ylim=(0, 800),
+            hide_first_ytick=False,
+            legend=True,
+            layout=(("adjust", {"bottom": 0.5}), ("tight", {"pad": 2})),
+        ),
+        FigureSpec(
+            number=11,
+            input="fig11",
+            prepare=_fig11,
+            figsize=(10, 6),
+            series=(
+                Series(
+                    "line",
+                    lambda df: df["Year"],
+                    lambda df: df["Total Psychiatric Inpatient & Residential Care"] / 1000,
+                ),
+            ),
+            title="Decrease in Total Inpatient and Residential Beds during Deinstitutionalization, 1970-1986",
+            title_width=80,
+            suptitle_xy=(0.14, 0.92),
+            source=Text(
+                "\n    Source: Lutterman, T. (2022). Trends in Psychiatric Inpatient Capacity, United States and Each State, 1970 to 2018. Technical Assistance Collaborative Paper No. 2. Alexandria, VA: National Association of State Mental Health Program Directors ",
+                0.11, -0.05, width=112,
+            ),
+            note=Text(
+                "\n    Note: Count represents beds from state & county psychiatric hospitals, private psychiatric hospitals, general hospitals with separate psychiatric units, VA medical centers, residential treatment centers, and other inpatient and residential treatment beds.\n    ",
+                0.10, -0.15, width=112,
+            ),
+            ylabel="Count (in Thousands)",
+            xlim=("1970", "1986"),
+            ylim=(0, 500),
+            layout=(("adjust", {"bottom": 0.3}), ("tight", {"pad": 2})),
+        ),
     )
-    ax.legend(frameon=False)
-
-    #xticks = ax.yaxis.get_major_ticks()
-    #xticks[0].label1.set_visible(False)
-    plt.subplots_adjust(bottom=0.5)
-    plt.tight_layout(pad=2)
-
-    if save:
-        fig.savefig(
-            out_path("fig9.png"),
-            bbox_inches="tight",
-            dpi=300,
-            facecolor=fig.get_facecolor(),
-        )
-        print("Figure 9 saved in out/")
-    else:
-        plt.show()
-
-    return
-
-
-def plot_fig10(df: pd.DataFrame = None, save=False):
-    if df is None:
-        df = pd.read_csv(processed_data_path("clean_fig10_data.csv"))
-        df["year"] = pd.to_datetime(df["year"], format="%Y")
-
-    set_properties()
-
-    fig, ax = plt.subplots(figsize=(10, 5))
-
-    fig, ax = style_plot_axes(fig, ax)
-    ax.spines["bottom"].set_color("#aeb0b7")
+}
 
-    ax.plot(df["year"], df["std_surv_tot"], color="#2c48dc", label="Standard survey deficiencies")
-    ax.plot(df["year"], df["comp_surv_tot"], color="#ff8000", label="Complaint survey deficiencies")
 
-    title_wrapper = textwrap.TextWrapper(width=80)
-    source_wrapper = textwrap.TextWrapper(width=110)
-    note_wrapper = textwrap.TextWrapper(width=110)
+def plot_fig3(df: pd.DataFrame = None, save=False, **options):
+    return plot_figure("fig3", df, save, **options)
 
-    title = "Psychiatric Residential Treatment Facilities (PRTFs) Standard Survey and Complaint Survey Deficiencies, 2010-2023"
-    wrapped_title = title_wrapper.fill(text=title)
-    source_text = "Source: Active Provider and Supplier Counts Report, Quality Certification & Oversight Reports, available at https://qcor.cms.gov/main.jsp"
-    wrapped_source = source_wrapper.fill(text=source_text)
-    note_text = "Note: Counts represent total calendar year national violations for Conditions of Participation for PRTFs, which regulate safety. Standard surveys are those produced by federal surveyors at random. Complaint surveys are those produced by federal surveyors following a patient complaint."
-    wrapped_note = note_wrapper.fill(text=note_text)
 
-    ax.set_xlim("2010", "2023")
-    ax.set_ylim(0, 800)
-    ax.set_ylabel("Count", size=11, color="#aeb0b7", fontweight="bold", labelpad=10)
-    ax.set_title(wrapped_title, color="#20222e", fontweight="bold", loc="left")
-    fig.suptitle("Figure 10", fontsize=12, x=0.135, y=0.91)
+def plot_fig4(df: pd.DataFrame = None, save=False, **options):
+    return plot_figure("fig4", df, save, **options)
 
-    fig.text(
-        0.10,-0.015, wrapped_source, ha="left", va="bottom", fontsize=11, color="#aeb0b7",
-    )
-    fig.text(
-        0.10, -0.115, wrapped_note, ha="left", va="bottom", fontsize=11, color="#20222e"
-    )
 
-    ax.legend(frameon=False)
-    #xticks = ax.yaxis.get_major_ticks()
-    #xticks[0].label1.set_visible(False)
-    plt.subplots_adjust(bottom=0.5)
-    plt.tight_layout(pad=2)
-
-    if save:
-        fig.savefig(
-            out_path("fig10.png"),
-            bbox_inches="tight",
-            dpi=300,
-            facecolor=fig.get_facecolor(),
-        )
-        print("Figure 10 saved in out/")
-    else:
-        plt.show()
+def plot_fig5(df: pd.DataFrame = None, save=False, **options):
+    return plot_figure("fig5", df, save, **options)
 
-    return None
 
+def plot_fig6(df: pd.DataFrame = None, save=False, **options):
+    return plot_figure("fig6", df, save, **options)
 
-def plot_fig11(df: pd.DataFrame = None, save=False):
-    if df is None:
-        df = pd.read_csv(data_path("youth-rtc", "fig11.csv"))
-        df["Year"] = pd.to_datetime(df["Year"].astype(str), format="%Y")
 
-        for col in df.columns[1:]:
-            df[col] = df[col].str.replace(",", "").astype(int)
+def plot_fig7(df: pd.DataFrame = None, save=False, **options):
+    return plot_figure("fig7", df, save, **options)
 
-    set_properties()
 
-    fig, ax = plt.subplots(figsize=(10, 6))
+def plot_fig8(df: pd.DataFrame = None, save=False, **options):
+    return plot_figure("fig8", df, save, **options)
 
-    fig, ax = style_plot_axes(fig, ax)
-    ax.spines["bottom"].set_color("#aeb0b7")
 
-    ax.plot(
-        df["Year"],
-        df["Total Psychiatric Inpatient & Residential Care"] / 1000,
-        color="#2c48dc",
-    )
+def plot_fig9(df: pd.DataFrame = None, save=False, **options):
+    return plot_figure("fig9", df, save, **options)
 
-    title_wrapper = textwrap.TextWrapper(width=80)
-    source_wrapper = textwrap.TextWrapper(width=112)
-    note_wrapper = textwrap.TextWrapper(width=112)
 
-    title = "Decrease in Total Inpatient and Residential Beds during Deinstitutionalization, 1970-1986"
-    wrapped_title = title_wrapper.fill(text=title)
-    source_text = """
-    Source: Lutterman, T. (2022). Trends in Psychiatric Inpatient Capacity, United States and Each State, 1970 to 2018. Technical Assistance Collaborative Paper No. 2. Alexandria, VA: National Association of State Mental Health Program Directors """
-    wrapped_source = source_wrapper.fill(text=source_text)
-    note_text = """
-    Note: Count represents beds from state & county psychiatric hospitals, private psychiatric hospitals, general hospitals with separate psychiatric units, VA medical centers, residential treatment centers, and other inpatient and residential treatment beds.
-    """
-
-    wrapped_note = note_wrapper.fill(text=note_text)
-
-    ax.set_xlim("1970", "1986")
-    ax.set_ylim(0, 500)
-    ax.set_ylabel(
-        "Count (in Thousands)", size=11, color="#aeb0b7", fontweight="bold", labelpad=10
-    )
-    ax.set_title(wrapped_title, color="#20222e", fontweight="bold", loc="left")
-    fig.suptitle("Figure 11", fontsize=12, x=0.14, y=0.92)
-
-    fig.text(
-        0.11,
-        -0.05,
-        wrapped_source,
-        ha="left",
-        va="bottom",
-        fontsize=11,
-        color="#aeb0b7",
-    )
-    fig.text(
-        0.10, -0.15, wrapped_note, ha="left", va="bottom", fontsize=11, color="#20222e"
-    )
+def plot_fig10(df: pd.DataFrame = None, save=False, **options):
+    return plot_figure("fig10", df, save, **options)
 
-    xticks = ax.yaxis.get_major_ticks()
-    xticks[0].label1.set_visible(False)
-    plt.subplots_adjust(bottom=0.3)
-    plt.tight_layout(pad=2)
-
-    if save:
-        fig.savefig(
-            out_path("fig11.png"),
-            bbox_inches="tight",
-            dpi=300,
-            facecolor=fig.get_facecolor(),
-        )
-        print("Figure 11 saved in out/")
-    else:
-        plt.show()
 
-    return
+def plot_fig11(df: pd.DataFrame = None, save=False, **options):
+    return plot_figure("fig11", df, save, **options)
 
 
 def list_files(directory: str):
@@ -618,13 +784,165 @@ def list_files(directory: str):
     return files
 
 
+FIGURES = {
+    "fig3": plot_fig3,
+    "fig4": plot_fig4,
+    "fig5": plot_fig5,
+    "fig6": plot_fig6,
+    "fig7": plot_fig7,
+    "fig8": plot_fig8,
+    "fig9": plot_fig9,
+    "fig10": plot_fig10,
+    "fig11": plot_fig11,
+}
+
+
+def _init_worker(data: str = None, repo: str = None):
+    """
+    initializer for pool worker processes: points util.env at the parent's
+    data and repo roots (a worker that was not forked does not share them),
+    selects Agg (a worker never shows a window) and warms matplotlib like
+    _warm_up
+    """
+    env.configure(data, repo)
+    mpl.use("Agg")
+    _warm_up()
+
+
+def _warm_up():
+    """
+    loads the font cache so the first figure does not pay for it; safe in the
+    caller's process, as figures render on Agg canvases without switching
+    its backend
+    """
+    from matplotlib import font_manager
+
+    font_manager.findfont(font_manager.FontProperties())
+
+
+def _render_figure(
+    name: str, origin: float = None, profile: str = "publication", formats=("png",), report=None
+) -> dict:
+    # origin: the parent's run_origin() when it is recording spans
+    if origin is not None:
+        start_run(origin=origin)
+    start = time.perf_counter()
+    result = {
+        "figure": name,
+        "path": figure_path(name, profile, formats[0]),
+        "paths": [figure_path(name, profile, fmt) for fmt in formats],
+        "error": None,
+        "written": {},
+    }
+    try:
+        result["written"] = FIGURES[name](save=True, profile=profile, formats=formats, report=report)
+    except Exception as exc:
+        result["path"] = None
+        result["paths"] = []
+        result["error"] = f"{type(exc).__name__}: {exc}"
+    result["seconds"] = time.perf_counter() - start
+    if origin is not None:
+        result["events"] = finish_run()
+
+    return result
+
+
+def build_figures(
+    figs=None,
+    workers=None,
+    threads=False,
+    profile: str = "publication",
+    formats=("png",),
+    report: str = None,
+) -> dict:
+    """
+    Render figures to out/ across a pool of worker processes.
+
+    Parameters:
+    - figs: iterable of figure names (e.g. "fig3"), defaults to all of FIGURES.
+    - workers: number of worker processes, defaults to one per CPU. With
+      workers=1 the figures are rendered in the current process.
+    - threads: render on a thread pool in this process instead of worker
+      processes.
+    - profile: "publication" (out/) or "draft" (low resolution, no tight
+      layout pass, out/draft/), see RENDER_PROFILES.
+    - formats: formats written from each figure's single layout, e.g.
+      ("png", "svg", "pdf").
+    - report: file name in out/ for a multi-page PDF of all the figures,
+      built in the same run. The pages go to one file in order, so the
+      figures are then rendered in this process whatever workers is.
+
+    Returns a dict keyed by figure name, in the order requested, holding the
+    output path (of the first format) and all paths written, whether each
+    was actually rewritten (written, see save_figure), the render time in
+    seconds and the error (if any).
+    """
+    figs = list(FIGURES) if figs is None else list(figs)
+    unknown = [name for name in figs if name not in FIGURES]
+    if unknown:
+        raise ValueError(f"Unknown figures: {', '.join(unknown)}")
+    if profile not in RENDER_PROFILES:
+        raise ValueError(f"Unknown render profile: {profile}")
+    formats = tuple(formats)
+    render = partial(_render_figure, profile=profile, formats=formats)
+
+    workers = 1 if report else min(workers or os.cpu_count() or 1, len(figs)) or 1
+    start = time.perf_counter()
+    results = {}
+
+    if report:
+        _warm_up()
+        os.makedirs(out_path(RENDER_PROFILES[profile].subdir), exist_ok=True)
+        report = out_path(RENDER_PROFILES[profile].subdir, report)
+        buffer = io.BytesIO()
+        with PdfPages(buffer, metadata=SAVE_METADATA["pdf"]) as pages:
+            for name in figs:
+                results[name] = render(name, report=pages)
+        write_if_changed(report, buffer.getvalue())
+    elif workers == 1:
+        _warm_up()
+        for name in figs:
+            results[name] = render(name)
+    elif threads:
+        _warm_up()
+        # each render scopes the style itself; holding it around the pool as
+        # well means a thread leaving its rc_context restores the styled
+        # values, not the defaults, under another thread still rendering
+        with plot_style(), ThreadPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(render, figs):
+                results[result["figure"]] = result
+    else:
+        # workers record their own spans and hand them back with the result
+        origin = run_origin()
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(env.DATA_PATH, env.REPO_PATH)
+        ) as pool:
+            futures = [pool.submit(render, name, origin) for name in figs]
+            for future in as_completed(futures):
+                result = future.result()
+                add_events(result.pop("events", []))
+                results[result["figure"]] = result
+
+    results = {name: results[name] for name in figs}
+    folder = os.path.join("out", RENDER_PROFILES[profile].subdir, "")
+
+    for name, result in results.items():
+        if result["error"] is not None:
+            status = f"failed ({result['error']})"
+        elif any(result["written"].values()):
+            status = f"saved in {folder}"
+        else:
+            status = f"unchanged in {folder}"
+        print(f"{name}: {result['seconds']:.2f}s {status}")
+    print(
+        f"Built {len(figs)} figures in {time.perf_counter() - start:.2f}s "
+        f"with {workers} {'threads' if threads else 'workers'}"
+    )
+    if report:
+        print(f"Report written to {report}")
+
+    return results
+
+
 if __name__ == "__main__":
-    #plot_fig3(save=True)
-    #plot_fig4(save=True)
-    #plot_fig5(save=True)
-    #plot_fig6(save=True)
-    #plot_fig7(save=True)
-    #plot_fig8(save=True)
-    plot_fig9(save=True)
-    plot_fig10(save=True)
-    #plot_fig11(save=True)
+    build_figures()
@@ -0,0 +1,326 @@
+import hashlib
+import os
+import re
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+import clean_data
+from util.cache import function_hash
+from util.env import data_path
+from util.manifest import get_manifest
+
+# DuckDB is optional; a path ending in .duckdb selects it over SQLite
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+SOURCES = ("wisqars", "qcor", "nmhss")
+
+# table -> column groups to index
+INDEXES = {
+    "wisqars": [("year",), ("cause", "year")],
+    "qcor": [("year",), ("state", "year")],
+    "qcor_national": [("year",)],
+    "qcor_totals": [("year",), ("state", "year")],
+    "nmhss": [("year",), ("state", "year"), ("caseid", "year")],
+}
+
+AGGREGATES = ("sum", "count", "avg", "min", "max")
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def database_path(engine: str = "sqlite") -> str:
+    return data_path("youth_prtf.duckdb" if engine == "duckdb" else "youth_prtf.sqlite")
+
+
+def connect(path: str = None):
+    """
+    Open the source database: DuckDB when path ends in ".duckdb", SQLite
+    otherwise. Defaults to database_path().
+    """
+    path = database_path() if path is None else path
+    if path.endswith(".duckdb"):
+        if duckdb is None:
+            raise ImportError("duckdb is not installed; use a .sqlite database path")
+        return duckdb.connect(path)
+
+    return sqlite3.connect(path)
+
+
+def ingest(sources=SOURCES, path: str = None, force: bool = False) -> dict:
+    """
+    Load the raw WISQARS, QCOR and N-MHSS sources into the database, one
+    typed table per source (QCOR national totals in qcor_national) with
+    indexes on year, state and facility. A source is only re-ingested when
+    its files or its loader changed since the last ingest.
+
+    Parameters:
+    - sources: names from SOURCES
+    - path: database file, see connect
+    - force: re-ingest even unchanged sources
+
+    Returns a dict of source -> "ingested" or "unchanged".
+    """
+    unknown = [source for source in sources if source not in SOURCES]
+    if unknown:
+        raise ValueError(f"Unknown sources: {', '.join(unknown)}")
+
+    con = connect(path)
+    status = {}
+    try:
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS _sources "
+            "(name TEXT PRIMARY KEY, fingerprint TEXT, rows INTEGER, ingested TEXT)"
+        )
+        for source in sources:
+            fingerprint = _source_fingerprint(source)
+            row = con.execute("SELECT fingerprint FROM _sources WHERE name = ?", [source]).fetchone()
+            if not force and row is not None and row[0] == fingerprint:
+                status[source] = "unchanged"
+                print(f"{source}: up to date, not re-ingested")
+                continue
+
+            start = time.perf_counter()
+            tables = _LOADERS[source]()
+            for table, df in tables.items():
+                _write_table(con, table, df)
+            rows = sum(len(df) for df in tables.values())
+            con.execute("DELETE FROM _sources WHERE name = ?", [source])
+            con.execute(
+                "INSERT INTO _sources VALUES (?, ?, ?, ?)",
+                [source, fingerprint, rows, time.strftime("%Y-%m-%dT%H:%M:%S")],
+            )
+            con.commit()
+            status[source] = "ingested"
+            print(f"{source}: {rows} rows ingested in {time.perf_counter() - start:.2f}s")
+    finally:
+        con.close()
+
+    return status
+
+
+def query(sql: str, params=(), path: str = None) -> pd.DataFrame:
+    """
+    Run a SQL query against the source database and return the result.
+    """
+    con = connect(path)
+    try:
+        if isinstance(con, sqlite3.Connection):
+            return pd.read_sql_query(sql, con, params=list(params))
+        return con.execute(sql, list(params)).df()
+    finally:
+        con.close()
+
+
+def aggregate(
+    table: str, measure: str, by=(), where: dict = None, func: str = "sum", path: str = None
+) -> pd.DataFrame:
+    """
+    Aggregate one column in-engine:
+    SELECT by..., func(measure) AS measure FROM table WHERE ... GROUP BY by.
+
+    Parameters:
+    - table: str, e.g. "wisqars"
+    - measure: str, column to aggregate
+    - by: columns to group (and sort) by
+    - where: dict of column -> value, or a list/tuple of values to match any of
+    - func: one of AGGREGATES
+    - path: database file, see connect
+
+    Returns a frame with the by columns and a measure column.
+    """
+    if func not in AGGREGATES:
+        raise ValueError(f"Unknown aggregate: {func}")
+    by = list(by)
+    where = {} if where is None else where
+
+    clauses, params = [], []
+    for col, value in where.items():
+        if isinstance(value, (list, tuple, set)):
+            value = list(value)
+            clauses.append(f"{_quote(col)} IN ({', '.join('?' * len(value))})")
+            params.extend(value)
+        else:
+            clauses.append(f"{_quote(col)} = ?")
+            params.append(value)
+
+    columns = [_quote(col) for col in by]
+    selected = [*columns, f"{func.upper()}({_quote(measure)}) AS {_quote(measure)}"]
+    sql = f"SELECT {', '.join(selected)} FROM {_quote(table)}"
+    if clauses:
+        sql += f" WHERE {' AND '.join(clauses)}"
+    if columns:
+        sql += f" GROUP BY {', '.join(columns)} ORDER BY {', '.join(columns)}"
+
+    return query(sql, params, path)
+
+
+def fig8_data(path: str = None) -> pd.DataFrame:
+    """
+    Figure 8 input, yearly youth suicides, computed in-engine in the
+    clean_fig8_data.csv layout.
+    """
+    df = aggregate("wisqars", "deaths", by=("year",), where={"cause": "Suicide"}, path=path)
+    df = df.rename(columns={"year": "Year", "deaths": "Count"})
+
+    return df.astype({"Year": "int64", "Count": "int64"})
+
+
+def fig10_data(path: str = None) -> pd.DataFrame:
+    """
+    Figure 10 input, national PRTF deficiencies by year, survey type and
+    kind, computed in-engine in the clean_fig10_data.csv layout. A year is
+    taken from its export's national totals when it has them and summed over
+    states otherwise; years reporting neither are left out.
+    """
+    sums = [
+        f"SUM(CASE WHEN survey = '{survey}' AND kind = '{kind}' THEN deficiencies END)"
+        f" AS {survey}_{kind}"
+        for survey in clean_data.QCOR_SURVEYS
+        for kind in clean_data.QCOR_KINDS
+    ]
+    select = f"SELECT year, {', '.join(sums)}, COUNT(deficiencies) AS reported FROM {{}} GROUP BY year"
+    national = query(select.format("qcor_national"), path=path).set_index("year")
+    states = query(select.format("qcor"), path=path).set_index("year")
+    national = national[national["reported"] > 0]
+    states = states[(states["reported"] > 0) & ~states.index.isin(national.index)]
+
+    totals = query(
+        "SELECT year, SUM(CASE WHEN state = ? THEN total END) AS national, "
+        "SUM(CASE WHEN state <> ? THEN total END) AS states FROM qcor_totals GROUP BY year",
+        [clean_data.QCOR_NATIONAL] * 2,
+        path,
+    ).set_index("year")
+
+    df = pd.concat([national, states]).sort_index().drop(columns="reported")
+    df["total_surv"] = totals["national"].where(df.index.isin(national.index), totals["states"])
+    df = df.fillna(0).astype("int64").reset_index()
+    for survey in clean_data.QCOR_SURVEYS:
+        df[f"{survey}_tot"] = sum(df[f"{survey}_{kind}"] for kind in clean_data.QCOR_KINDS)
+    df["year"] = df.pop("year").astype(str)
+
+    return df
+
+
+def _wisqars_tables() -> dict:
+    columns = {
+        "Cause Category": "cause",
+        "Sex": "sex",
+        "Race": "race",
+        "Age Group": "age_group",
+        "Deaths": "deaths",
+        "Population": "population",
+    }
+    frames = []
+    for year, filepath in sorted(clean_data.wisqars_files().items()):
+        df = pd.read_csv(filepath, usecols=lambda col: col in columns, thousands=",")
+        df = df.rename(columns=columns)
+        df.insert(0, "year", year)
+        frames.append(df)
+
+    df = pd.concat(frames, ignore_index=True)
+    for col in ("deaths", "population"):
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+
+    return {"wisqars": df}
+
+
+def _qcor_tables() -> dict:
+    cube = clean_data.build_qcor_cube(save=False)
+    state, year, survey, kind = np.indices(cube.counts.shape).reshape(4, -1)
+    df = pd.DataFrame(
+        {
+            "state": cube.states[state],
+            "year": cube.years[year].astype("int64"),
+            "survey": np.asarray(cube.surveys)[survey],
+            "kind": np.asarray(cube.kinds)[kind],
+            "deficiencies": pd.array(cube.counts.reshape(-1), dtype="Int64"),
+        }
+    )
+    if cube.reported is not None:
+        # unreported cells are NULL, not zero; SUM skips them either way
+        df.loc[~cube.reported.reshape(-1), "deficiencies"] = pd.NA
+    national = df["state"] == clean_data.QCOR_NATIONAL
+
+    # the exports' Total column, NULL for state-years an export does not list
+    state, year = np.indices(cube.totals.shape).reshape(2, -1)
+    totals = pd.DataFrame(
+        {
+            "state": cube.states[state],
+            "year": cube.years[year].astype("int64"),
+            "total": pd.array(cube.totals.reshape(-1), dtype="Int64"),
+        }
+    )
+    totals.loc[~cube.reported.any(axis=(2, 3)).reshape(-1), "total"] = pd.NA
+
+    return {
+        "qcor": df[~national],
+        "qcor_national": df[national].drop(columns="state"),
+        "qcor_totals": totals,
+    }
+
+
+def _nmhss_tables() -> dict:
+    frames = []
+    for year, df in clean_data.get_nmhss_container().items():
+        df = df.rename(columns={"lst": "state"})
+        df.insert(0, "year", int(year))
+        frames.append(df)
+
+    return {"nmhss": pd.concat(frames, ignore_index=True)}
+
+
+_LOADERS = {"wisqars": _wisqars_tables, "qcor": _qcor_tables, "nmhss": _nmhss_tables}
+
+_SOURCE_PATHS = {
+    "wisqars": lambda: get_manifest().files("wisqars"),
+    "qcor": lambda: get_manifest().files("qcor"),
+    "nmhss": lambda: [*get_manifest().files("nmhss"), data_path("us-state-ansi-fips.csv")],
+}
+
+
+def _source_fingerprint(source: str) -> str:
+    # stat-based: ingesting is the expensive step, not deciding whether to
+    digest = hashlib.sha256(function_hash(_LOADERS[source]).encode())
+    if source == "nmhss":
+        digest.update(clean_data._nmhss_loader_version().encode())
+    for filepath in _SOURCE_PATHS[source]():
+        stat = os.stat(filepath)
+        digest.update(f"{filepath}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+
+    return digest.hexdigest()
+
+
+def _write_table(con, table: str, df: pd.DataFrame):
+    # categoricals and nullable ints are stored as their plain values
+    df = df.copy()
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(df[col].cat.categories.dtype)
+        elif isinstance(df[col].dtype, pd.api.extensions.ExtensionDtype):
+            df[col] = df[col].astype(object).where(df[col].notna(), None)
+
+    if isinstance(con, sqlite3.Connection):
+        df.to_sql(table, con, if_exists="replace", index=False, chunksize=50_000)
+    else:
+        con.register("_frame", df)
+        con.execute(f"CREATE OR REPLACE TABLE {_quote(table)} AS SELECT * FROM _frame")
+        con.unregister("_frame")
+
+    for columns in INDEXES.get(table, []):
+        if all(col in df.columns for col in columns):
+            name = _quote("_".join([table, *columns]))
+            con.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {_quote(table)} ({', '.join(map(_quote, columns))})")
+
+
+def _quote(identifier: str) -> str:
+    if not _IDENTIFIER.match(identifier):
+        raise ValueError(f"Not a valid column or table name: {identifier}")
+
+    return f'"{identifier}"'
@@ -0,0 +1,65 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+
+from util import loader
+
+# one writer thread: artifacts are written in the order they were queued
+_writer = None
+_pending = []
+_lock = threading.Lock()
+
+
+def write_csv(frame: pd.DataFrame, path: str, wait: bool = True, cache: bool = False, **options) -> Future:
+    """
+    Write frame to path as CSV, on a background thread unless wait is set.
+    The file is written under a temporary name and moved into place, so a
+    reader never sees half a file.
+
+    Parameters:
+    - frame: pd.DataFrame
+    - path: str
+    - wait: bool, block until the file is written
+    - cache: bool, hand frame to the shared loader as the parse of the new
+      file; only when reading the CSV back gives an equal frame
+    - options: keyword arguments for DataFrame.to_csv, e.g. index=False
+
+    Returns a Future that completes once the file is in place.
+    """
+    global _writer
+    if wait:
+        future = Future()
+        future.set_result(_write(frame, path, cache, options))
+        return future
+
+    with _lock:
+        if _writer is None:
+            _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artifacts")
+        future = _writer.submit(_write, frame, path, cache, options)
+        _pending.append(future)
+
+    return future
+
+
+def wait_for_writes():
+    """
+    Block until every queued artifact is written, raising the first error.
+    """
+    with _lock:
+        pending = list(_pending)
+        _pending.clear()
+
+    for future in pending:
+        future.result()
+
+
+def _write(frame: pd.DataFrame, path: str, cache: bool, options: dict) -> str:
+    tmp_path = f"{path}.tmp"
+    frame.to_csv(tmp_path, **options)
+    os.replace(tmp_path, path)
+    if cache:
+        loader.remember(path, frame)
+
+    return path
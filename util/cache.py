@@ -0,0 +1,129 @@
+import hashlib
+import inspect
+import json
+import os
+
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    """
+    sha256 of a file's contents, read in blocks so large survey files are not
+    loaded into memory at once
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def function_hash(func) -> str:
+    """
+    sha256 of a function's source, so editing a cleaning or plotting function
+    invalidates what it produced
+    """
+    return hashlib.sha256(inspect.getsource(func).encode()).hexdigest()
+
+
+def write_if_changed(path: str, data: bytes) -> bool:
+    """
+    Write data to path unless the file already holds the same bytes (same
+    size and sha256), so unchanged outputs keep their mtime and are not
+    picked up by git or file sync. Returns True if the file was written.
+    """
+    if os.path.exists(path) and os.path.getsize(path) == len(data):
+        if file_hash(path) == hashlib.sha256(data).hexdigest():
+            return False
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+    return True
+
+
+def expand_paths(paths) -> list:
+    """
+    Expand directories into the sorted list of files beneath them.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files.extend(os.path.join(root, name) for name in sorted(names))
+        else:
+            files.append(path)
+
+    return files
+
+
+class BuildCache:
+    """
+    Records, per pipeline stage, a fingerprint of the stage's inputs and code
+    along with the hashes of the outputs it wrote.
+
+    File hashes are memoised against (size, mtime) so an unchanged tree is
+    checked with stat calls only.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stages = {}
+        self.files = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            self.stages = state.get("stages", {})
+            self.files = state.get("files", {})
+
+    def hash(self, path: str):
+        """
+        Content hash of path, or None if it does not exist.
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        key = [stat.st_size, stat.st_mtime_ns]
+        entry = self.files.get(path)
+        if entry is None or entry["stat"] != key:
+            entry = {"stat": key, "hash": file_hash(path)}
+            self.files[path] = entry
+
+        return entry["hash"]
+
+    def fingerprint(self, inputs, funcs) -> str:
+        digest = hashlib.sha256()
+        for path in expand_paths(inputs):
+            digest.update(path.encode())
+            digest.update(str(self.hash(path)).encode())
+        for func in funcs:
+            digest.update(function_hash(func).encode())
+
+        return digest.hexdigest()
+
+    def is_fresh(self, name: str, fingerprint: str) -> bool:
+        """
+        True if the stage last ran with the same fingerprint and its outputs
+        are still on disk unmodified.
+        """
+        entry = self.stages.get(name)
+        if entry is None or entry["fingerprint"] != fingerprint:
+            return False
+
+        return all(self.hash(path) == digest for path, digest in entry["outputs"].items())
+
+    def record(self, name: str, fingerprint: str, outputs):
+        self.stages[name] = {
+            "fingerprint": fingerprint,
+            "outputs": {path: self.hash(path) for path in outputs},
+        }
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"stages": self.stages, "files": self.files}, f, indent=1)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,162 @@
+import json
+import os
+
+import pandas as pd
+
+from util.cache import file_hash
+
+# pyarrow is optional (without it read_cached parses the source every time)
+# and imported on first use, so loading this module stays cheap
+pa = None
+feather = None
+
+_META_KEY = b"youth_prtf_source"
+
+
+def read_cached(source: str, cache_file: str, loader, columns=None, version: str = "") -> pd.DataFrame:
+    """
+    Read a frame from an uncompressed Feather (Arrow IPC) cache of source,
+    memory-mapping the file and reading only the requested columns. The cache
+    is (re)built with loader(source) when it is missing or when the source or
+    version changed since it was written.
+
+    Parameters:
+    - source: str, path to the raw file the cache was built from
+    - cache_file: str, path to the .feather cache file
+    - loader: callable taking source and returning the normalised frame
+    - columns: list of column names to read, defaults to all. Names missing
+      from the cached frame are ignored.
+    - version: str, identifies the loader; changing it invalidates the cache
+    """
+    if not _import_pyarrow():
+        df = loader(source)
+        return df if columns is None else df[[col for col in columns if col in df.columns]]
+
+    refresh_cache(source, cache_file, loader, version)
+
+    return read_feather(cache_file, columns)
+
+
+def refresh_cache(source: str, cache_file: str, loader, version: str = "") -> bool:
+    """
+    (Re)build the Feather cache of source if it is missing or stale, without
+    reading it back. Returns True if it was rebuilt.
+    """
+    if is_cache_fresh(cache_file, source, version):
+        return False
+
+    write_cache(loader(source), cache_file, source, version)
+
+    return True
+
+
+def write_feather(df: pd.DataFrame, path: str):
+    """
+    Write df as an uncompressed Feather (Arrow IPC) file, e.g. to hand a
+    frame from a worker process to its parent without pickling it.
+    """
+    _import_pyarrow()
+    feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), path, compression="uncompressed")
+
+
+def read_feather(path: str, columns=None, memory_map: bool = True) -> pd.DataFrame:
+    """
+    Read a Feather file written by write_feather or write_cache, keeping only
+    the requested columns that it holds.
+
+    Parameters:
+    - path: str
+    - columns: list of column names, defaults to all
+    - memory_map: bool, serve the read from a memory map of the file; turn
+      off when the file is about to be deleted
+    """
+    _import_pyarrow()
+    if columns is not None:
+        names = set(_schema(path).names)
+        columns = [col for col in columns if col in names]
+
+    return feather.read_table(path, columns=columns, memory_map=memory_map).to_pandas()
+
+
+def arrow_available() -> bool:
+    return _import_pyarrow()
+
+
+def write_cache(df: pd.DataFrame, cache_file: str, source: str, version: str = ""):
+    stat = os.stat(source)
+    meta = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_hash(source),
+        "version": version,
+    }
+
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    _write_table(pa.Table.from_pandas(df, preserve_index=False), cache_file, meta)
+
+
+def is_cache_fresh(cache_file: str, source: str, version: str = "") -> bool:
+    """
+    True if cache_file was built from the current contents of source by the
+    same loader version. Only stats the source unless its size or mtime moved;
+    when only the mtime moved and the hash still matches, the new mtime is
+    recorded so later checks go back to only stat'ing.
+    """
+    if not os.path.exists(cache_file):
+        return False
+
+    meta = cache_metadata(cache_file)
+    if meta is None or meta["version"] != version:
+        return False
+
+    stat = os.stat(source)
+    if stat.st_size != meta["size"]:
+        return False
+    if stat.st_mtime_ns == meta["mtime_ns"]:
+        return True
+
+    if file_hash(source) != meta["sha256"]:
+        return False
+
+    meta["mtime_ns"] = stat.st_mtime_ns
+    # read without a memory map so the file can be replaced on every platform
+    _write_table(feather.read_table(cache_file, memory_map=False), cache_file, meta)
+
+    return True
+
+
+def cache_metadata(cache_file: str):
+    metadata = _schema(cache_file).metadata or {}
+    if _META_KEY not in metadata:
+        return None
+
+    return json.loads(metadata[_META_KEY])
+
+
+def _import_pyarrow() -> bool:
+    global pa, feather
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.feather
+        except ImportError:
+            return False
+        pa, feather = pyarrow, pyarrow.feather
+
+    return True
+
+
+def _write_table(table, cache_file: str, meta: dict):
+    table = table.replace_schema_metadata(
+        {**(table.schema.metadata or {}), _META_KEY: json.dumps(meta).encode()}
+    )
+
+    tmp_file = f"{cache_file}.tmp"
+    # uncompressed so reads can be served straight from the memory map
+    feather.write_feather(table, tmp_file, compression="uncompressed")
+    os.replace(tmp_file, cache_file)
+
+
+def _schema(cache_file: str):
+    with pa.memory_map(cache_file) as mapped:
+        return pa.ipc.open_file(mapped).schema
@@ -0,0 +1,101 @@
+import csv
+import gzip
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+BLOCK_SIZE = 1 << 20
+
+
+def tsv_to_csv(
+    tsv_filepath: str,
+    csv_filepath: str,
+    compress: bool = None,
+    encoding: str = "utf-8",
+    block_size: int = BLOCK_SIZE,
+) -> dict:
+    """
+    Stream a TSV file into a CSV file in constant memory.
+
+    Fields are parsed and re-quoted with the csv module, so values containing
+    commas, quotes or newlines survive the conversion. Undecodable bytes are
+    carried through unchanged.
+
+    Parameters:
+    - tsv_filepath: str, path to the input TSV file
+    - csv_filepath: str, path to the output CSV file
+    - compress: bool, gzip the output; defaults to True when csv_filepath
+      ends with ".gz"
+    - encoding: str, text encoding of the input (and output)
+    - block_size: int, bytes read from and written to disk at a time
+
+    Returns a dict with the input size in bytes, the elapsed seconds and the
+    throughput in MB/s.
+    """
+    if compress is None:
+        compress = csv_filepath.endswith(".gz")
+
+    start = time.perf_counter()
+    with open(tsv_filepath, "rb", buffering=block_size) as raw_in:
+        tsv_file = io.TextIOWrapper(raw_in, encoding=encoding, errors="surrogateescape", newline="")
+        if compress:
+            csv_file = gzip.open(
+                csv_filepath, "wt", compresslevel=6, encoding=encoding, errors="surrogateescape", newline=""
+            )
+        else:
+            csv_file = open(
+                csv_filepath, "w", encoding=encoding, errors="surrogateescape", newline="", buffering=block_size
+            )
+        with csv_file:
+            csv.writer(csv_file).writerows(csv.reader(tsv_file, delimiter="\t"))
+
+    seconds = time.perf_counter() - start
+    size = os.path.getsize(tsv_filepath)
+    stats = {
+        "source": tsv_filepath,
+        "target": csv_filepath,
+        "bytes": size,
+        "seconds": seconds,
+        "mb_per_s": size / 1e6 / seconds if seconds else float("inf"),
+    }
+    print(
+        f"{os.path.basename(tsv_filepath)} -> {os.path.basename(csv_filepath)}: "
+        f"{size / 1e6:.1f} MB in {seconds:.2f}s ({stats['mb_per_s']:.1f} MB/s)"
+    )
+
+    return stats
+
+
+def tsv_to_csv_many(pairs, workers: int = None, **kwargs) -> list:
+    """
+    Convert several TSV files at once, one worker process per file.
+
+    Parameters:
+    - pairs: iterable of (tsv_filepath, csv_filepath)
+    - workers: number of worker processes, defaults to one per CPU
+    - kwargs: passed on to tsv_to_csv
+
+    Returns the per-file stats from tsv_to_csv, in the order given.
+    """
+    pairs = list(pairs)
+    if not pairs:
+        return []
+
+    start = time.perf_counter()
+    workers = min(workers or os.cpu_count() or 1, len(pairs))
+    if workers == 1:
+        results = [tsv_to_csv(src, dst, **kwargs) for src, dst in pairs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(tsv_to_csv, src, dst, **kwargs) for src, dst in pairs]
+            results = [future.result() for future in futures]
+
+    seconds = time.perf_counter() - start
+    total = sum(result["bytes"] for result in results)
+    print(
+        f"Converted {len(results)} files, {total / 1e6:.1f} MB in {seconds:.2f}s "
+        f"({total / 1e6 / seconds if seconds else float('inf'):.1f} MB/s)"
+    )
+
+    return results
@@ -1,14 +1,73 @@
+import configparser
 import os
 
+# environment variables and config file that set the data and repo roots;
+# the config file holds a [paths] section with data = ... and repo = ...
+DATA_ENV = "YOUTH_PRTF_DATA_PATH"
+REPO_ENV = "YOUTH_PRTF_REPO_PATH"
+CONFIG_ENV = "YOUTH_PRTF_CONFIG"
+CONFIG_FILENAME = "youth_prtf.ini"
+
+# used when neither the environment nor a config file sets a root
 data_root = r"C:/"
-DATA_PATH = os.path.join(
+DEFAULT_DATA_PATH = os.path.join(
     data_root, "Users", "CarolynGorman", "OneDrive", "Research", "data"
 )
-REPO_PATH = os.path.join(data_root, "Users", "CarolynGorman", "OneDrive", "repos", 
+DEFAULT_REPO_PATH = os.path.join(data_root, "Users", "CarolynGorman", "OneDrive", "repos",
                          "youth-rtc", "youth_rtc"
                          )
 
 
+def config_paths() -> list:
+    """
+    Config files looked for, in order: $YOUTH_PRTF_CONFIG, youth_prtf.ini in
+    the working directory, then ~/.youth_prtf.ini.
+    """
+    paths = [os.path.join(os.getcwd(), CONFIG_FILENAME), os.path.expanduser(f"~/.{CONFIG_FILENAME}")]
+    if os.environ.get(CONFIG_ENV):
+        paths.insert(0, os.environ[CONFIG_ENV])
+
+    return paths
+
+
+def load_roots() -> tuple:
+    """
+    (data root, repo root): each taken from its environment variable, else
+    from the [paths] section of the first config file found (relative paths
+    are relative to that file), else the defaults.
+    """
+    data, repo = os.environ.get(DATA_ENV), os.environ.get(REPO_ENV)
+
+    for path in config_paths():
+        if (data and repo) or not os.path.isfile(path):
+            continue
+        config = configparser.ConfigParser()
+        config.read(path)
+        base = os.path.dirname(os.path.abspath(path))
+        if not data and config.has_option("paths", "data"):
+            data = os.path.join(base, os.path.expanduser(config.get("paths", "data")))
+        if not repo and config.has_option("paths", "repo"):
+            repo = os.path.join(base, os.path.expanduser(config.get("paths", "repo")))
+        break
+
+    return data or DEFAULT_DATA_PATH, repo or DEFAULT_REPO_PATH
+
+
+def configure(data: str = None, repo: str = None):
+    """
+    Point data_path and repo_path at new roots, for this process and (via
+    the environment) the worker processes it starts.
+    """
+    global DATA_PATH, REPO_PATH
+    if data is not None:
+        DATA_PATH = os.environ[DATA_ENV] = data
+    if repo is not None:
+        REPO_PATH = os.environ[REPO_ENV] = repo
+
+
+DATA_PATH, REPO_PATH = load_roots()
+
+
 def data_path(*args):
     return os.path.join(DATA_PATH, *args)
 
@@ -18,4 +77,4 @@ def repo_path(*args):
 
 
 def src_path(*args):
-    return repo_path('src', *args)
\ No newline at end of file
+    return repo_path('src', *args)
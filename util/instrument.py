@@ -0,0 +1,247 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# spans of the current run; None when no run is being recorded
+_events = None
+_run_start = 0.0
+# wall-clock time span starts are measured from, shared with worker
+# processes so their spans land on the same timeline
+_run_origin = None
+_origin_offset = 0.0
+_local = threading.local()
+
+
+def start_run(trace_memory: bool = True, origin: float = None):
+    """
+    Start recording stage spans. With trace_memory, tracemalloc runs for the
+    whole run so each span can report its Python allocation peak.
+
+    A worker process recording spans for a parent's run passes the parent's
+    run_origin() as origin, so its span starts are relative to the parent's
+    run rather than to its own.
+    """
+    global _events, _run_start, _run_origin, _origin_offset
+    _events = []
+    _run_start = time.perf_counter()
+    _run_origin = time.time() if origin is None else origin
+    _origin_offset = time.time() - _run_origin
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def finish_run(path: str = None, chrome: bool = None) -> list:
+    """
+    Stop recording and return the spans, writing them to path if given.
+
+    Parameters:
+    - path: str, output file
+    - chrome: bool, write the Chrome trace event format (chrome://tracing,
+      Perfetto) instead of a plain list of spans; defaults to True when path
+      ends with ".trace.json"
+    """
+    global _events
+    events, _events = _events or [], None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+    if path is not None:
+        write_trace(events, path, chrome)
+
+    return events
+
+
+def is_recording() -> bool:
+    return _events is not None
+
+
+def run_origin():
+    """
+    Wall-clock start (time.time()) of the run being recorded, or None.
+    """
+    return _run_origin if _events is not None else None
+
+
+def add_events(events: list):
+    """
+    Merge spans recorded in another process (e.g. a figure worker).
+    """
+    if _events is not None:
+        _events.extend(events)
+
+
+@contextmanager
+def stage(name: str, category: str = "stage"):
+    """
+    Record wall time, CPU time, peak RSS, tracemalloc peak, I/O bytes and
+    any counts added with count() for the enclosed block. Does nothing when
+    no run is being recorded.
+
+    The tracemalloc peak is process-wide and resetting it would disturb
+    every other open span, so only spans on the main thread reset and
+    report it; spans opened on pool threads leave it out.
+    """
+    if _events is None:
+        yield
+        return
+
+    stack = _stack()
+    span = {
+        "name": name,
+        "category": category,
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+        "start": time.perf_counter() - _run_start + _origin_offset,
+        "parent": stack[-1]["name"] if stack else None,
+        "rows_read": 0,
+        "rows_written": 0,
+    }
+    cpu_start = time.process_time()
+    io_start = _io_bytes()
+    traced = tracemalloc.is_tracing() and threading.current_thread() is threading.main_thread()
+    if traced:
+        if stack:
+            stack[-1]["_peak"] = max(stack[-1].get("_peak", 0), tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    stack.append(span)
+
+    try:
+        yield
+    finally:
+        stack.pop()
+        span["wall_s"] = time.perf_counter() - _run_start + _origin_offset - span["start"]
+        span["cpu_s"] = time.process_time() - cpu_start
+        span["peak_rss_mb"] = _peak_rss_mb()
+        io_end = _io_bytes()
+        if io_start is not None and io_end is not None:
+            span["read_bytes"] = io_end[0] - io_start[0]
+            span["write_bytes"] = io_end[1] - io_start[1]
+        if traced and tracemalloc.is_tracing():
+            peak = max(span.pop("_peak", 0), tracemalloc.get_traced_memory()[1])
+            span["tracemalloc_peak_mb"] = peak / 2**20
+            if stack:
+                stack[-1]["_peak"] = max(stack[-1].get("_peak", 0), peak)
+        if stack:
+            stack[-1]["rows_read"] += span["rows_read"]
+            stack[-1]["rows_written"] += span["rows_written"]
+        if _events is not None:
+            _events.append(span)
+
+
+def instrumented(func=None, *, category: str = "stage"):
+    """
+    Decorator running the function inside stage(<function name>).
+    """
+    if func is None:
+        return functools.partial(instrumented, category=category)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with stage(func.__name__, category):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def count(rows_read: int = 0, rows_written: int = 0):
+    """
+    Add row counts to the innermost open stage.
+    """
+    stack = _stack()
+    if _events is not None and stack:
+        stack[-1]["rows_read"] += rows_read
+        stack[-1]["rows_written"] += rows_written
+
+
+def write_trace(events: list, path: str, chrome: bool = None):
+    if chrome is None:
+        chrome = path.endswith(".trace.json")
+
+    if chrome:
+        payload = {
+            "traceEvents": [
+                {
+                    "name": event["name"],
+                    "cat": event["category"],
+                    "ph": "X",
+                    "ts": event["start"] * 1e6,
+                    "dur": event["wall_s"] * 1e6,
+                    "pid": event["pid"],
+                    "tid": event["tid"],
+                    "args": {
+                        key: value
+                        for key, value in event.items()
+                        if key not in ("name", "category", "pid", "tid", "start", "wall_s")
+                    },
+                }
+                for event in events
+            ],
+            "displayTimeUnit": "ms",
+        }
+    else:
+        payload = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "spans": events}
+
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=1)
+
+
+def summarize(events: list):
+    """
+    Print the top-level stage spans of a run (those not nested in another
+    span of their thread), slowest first.
+    """
+    for event in sorted(events, key=lambda event: -event["wall_s"]):
+        if event["category"] != "stage" or event.get("parent") is not None:
+            continue
+        print(
+            f"{event['name']:28} {event['wall_s']:7.2f}s wall {event['cpu_s']:7.2f}s cpu"
+            f" {event.get('tracemalloc_peak_mb', 0):8.1f} MB peak"
+            f" {event['rows_read']:>9} rows in {event['rows_written']:>7} rows out"
+        )
+
+
+def _stack() -> list:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def _peak_rss_mb():
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # bytes on macOS, kilobytes elsewhere
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / 2**20
+    return None
+
+
+def _io_bytes():
+    if psutil is not None:
+        try:
+            counters = psutil.Process().io_counters()
+            return counters.read_bytes, counters.write_bytes
+        except (AttributeError, psutil.Error):
+            pass
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return int(fields["rchar"]), int(fields["wchar"])
+    except OSError:
+        return None
@@ -0,0 +1,111 @@
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# total in-memory size of the frames kept, in bytes; the least recently used
+# frames are dropped first once it is exceeded
+BUDGET_BYTES = 512 * 2**20
+
+_frames = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def read_frame(path: str, reader=pd.read_csv, **options) -> pd.DataFrame:
+    """
+    Read a file through a shared cache keyed by (path, mtime, size, reader,
+    options), so every caller asking for the same file with the same parse
+    options gets the one parse. A rewritten file gets a new key and is read
+    again.
+
+    The frame handed back must be treated as read-only: it shares its data
+    with the cached frame (copy-on-write pandas makes any change copy first;
+    older pandas gets a deep copy instead).
+
+    Parameters:
+    - path: str
+    - reader: function taking the path and options, e.g. pd.read_excel
+    - options: keyword arguments for reader, e.g. index_col=0
+    """
+    key = _key(path, reader, options)
+    with _lock:
+        if key in _frames:
+            _frames.move_to_end(key)
+            _stats["hits"] += 1
+            return _view(_frames[key][0])
+        _stats["misses"] += 1
+
+    frame = reader(path, **options)
+    _store(key, frame)
+
+    return _view(frame)
+
+
+def remember(path: str, frame: pd.DataFrame, reader=pd.read_csv, **options):
+    """
+    Cache frame as the result of reading path, which the caller has just
+    written; the next read_frame of it is then served without parsing. Only
+    use this when reader would give back an equal frame.
+    """
+    _store(_key(path, reader, options), frame)
+
+
+def cache_info() -> dict:
+    """
+    Hits, misses and evictions so far, plus the frames and bytes held.
+    """
+    with _lock:
+        return {
+            **_stats,
+            "frames": len(_frames),
+            "bytes": sum(size for _, size in _frames.values()),
+        }
+
+
+def clear():
+    with _lock:
+        _frames.clear()
+        _stats.update(hits=0, misses=0, evictions=0)
+
+
+def _key(path: str, reader, options: dict) -> tuple:
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+
+    return (
+        path,
+        stat.st_mtime_ns,
+        stat.st_size,
+        f"{reader.__module__}.{reader.__qualname__}",
+        tuple(sorted(options.items())),
+    )
+
+
+def _store(key: tuple, frame: pd.DataFrame):
+    size = int(frame.memory_usage(deep=True).sum())
+    with _lock:
+        if size > BUDGET_BYTES:
+            return
+        # older versions of the file can never be hit again
+        for stale in [other for other in _frames if other[0] == key[0] and other[1:3] != key[1:3]]:
+            del _frames[stale]
+        _frames[key] = (frame, size)
+        _frames.move_to_end(key)
+        while sum(size for _, size in _frames.values()) > BUDGET_BYTES:
+            _frames.popitem(last=False)
+            _stats["evictions"] += 1
+
+
+def _view(frame: pd.DataFrame) -> pd.DataFrame:
+    return frame.copy(deep=not _copy_on_write())
+
+
+def _copy_on_write() -> bool:
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    try:
+        return pd.get_option("mode.copy_on_write") is True
+    except KeyError:  # pandas < 1.5
+        return False
@@ -0,0 +1,199 @@
+import json
+import os
+import re
+import threading
+
+from util import env
+from util.cache import file_hash
+
+# dataset -> directory under the data root holding its raw files
+DATASETS = {
+    "wisqars": ("WISQARS-data",),
+    "qcor": ("qcor", "prtf"),
+    "nmhss": ("NMHSS", "renamed"),
+    "youth-rtc": ("youth-rtc",),
+}
+
+# a survey or export year in a file name, not part of a longer number
+YEAR = re.compile(r"(?<!\d)((?:19|20)\d{2})(?!\d)")
+
+VERSION = 1
+
+_manifests = {}
+_lock = threading.Lock()
+
+
+def manifest_path() -> str:
+    return env.repo_path(".input_manifest.json")
+
+
+def parse_year(filename: str):
+    """
+    Year in a raw file name, or None if it carries none.
+    """
+    match = YEAR.search(filename)
+
+    return int(match.group(1)) if match else None
+
+
+def get_manifest() -> "Manifest":
+    """
+    The manifest of the current data root, loaded once per process (and
+    again after util.env.configure points at another root).
+    """
+    key = (env.DATA_PATH, manifest_path())
+    with _lock:
+        if key not in _manifests:
+            _manifests[key] = Manifest(key[1], key[0])
+
+        return _manifests[key]
+
+
+class Manifest:
+    """
+    Persisted record of the raw input files under the data root: for each
+    file, keyed by its path relative to the root, the dataset, the year
+    parsed from its name, its size, mtime and sha256.
+
+    Each dataset's file list is stored with its directory's mtime, which
+    changes whenever a file is added, removed or renamed there, so the
+    directory is only listed again when that moved. The recorded files are
+    stat'ed on every lookup, since a file rewritten in place (a re-downloaded
+    export) leaves the directory alone; only files whose size or mtime moved
+    are hashed again.
+    """
+
+    def __init__(self, path: str, data_root: str):
+        self.path = path
+        self.data_root = data_root
+        self.datasets = {}
+        self._lock = threading.RLock()
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            if state.get("version") == VERSION and state.get("data_root") == data_root:
+                self.datasets = state["datasets"]
+
+    def entries(self, dataset: str) -> list:
+        """
+        Records of a dataset's files, sorted by year then path, each a dict
+        with path (absolute), relpath, dataset, year, size, mtime_ns, sha256.
+        """
+        self.refresh([dataset])
+        files = self.datasets[dataset]["files"]
+
+        return [
+            {"path": self.absolute(*relpath.split("/")), "relpath": relpath, **files[relpath]}
+            for relpath in sorted(files, key=lambda relpath: (files[relpath]["year"] or 0, relpath))
+        ]
+
+    def files(self, dataset: str, years=None) -> list:
+        """
+        Absolute paths of a dataset's files, optionally only those whose
+        name carries one of years.
+        """
+        years = None if years is None else set(years)
+
+        return [entry["path"] for entry in self.entries(dataset) if years is None or entry["year"] in years]
+
+    def by_year(self, dataset: str, years=None) -> dict:
+        """
+        Map year -> path for a dataset's files that carry a year.
+        """
+        years = None if years is None else set(years)
+
+        return {
+            entry["year"]: entry["path"]
+            for entry in self.entries(dataset)
+            if entry["year"] is not None and (years is None or entry["year"] in years)
+        }
+
+    def refresh(self, datasets=None, force: bool = False) -> list:
+        """
+        Bring the records of datasets (default all) up to date, saving the
+        manifest if anything changed.
+
+        Parameters:
+        - datasets: names from DATASETS
+        - force: list every directory again even if its mtime is unchanged
+
+        Returns the names of the datasets whose records changed.
+        """
+        datasets = list(DATASETS) if datasets is None else datasets
+        unknown = [dataset for dataset in datasets if dataset not in DATASETS]
+        if unknown:
+            raise ValueError(f"Unknown datasets: {', '.join(unknown)}")
+
+        changed = []
+        with self._lock:
+            for dataset in datasets:
+                directory = self.absolute(*DATASETS[dataset])
+                try:
+                    dir_mtime = os.stat(directory).st_mtime_ns
+                except FileNotFoundError:
+                    dir_mtime = None
+
+                known = self.datasets.get(dataset)
+                if dir_mtime is None:
+                    files = {}
+                elif not force and known is not None and known["mtime_ns"] == dir_mtime:
+                    files = self._restat(dataset, known["files"])
+                else:
+                    files = self._scan(dataset, directory)
+                if known is None or known["files"] != files or known["mtime_ns"] != dir_mtime:
+                    self.datasets[dataset] = {"mtime_ns": dir_mtime, "files": files}
+                    changed.append(dataset)
+
+            if changed:
+                self.save()
+
+        return changed
+
+    def absolute(self, *parts) -> str:
+        return os.path.join(self.data_root, *parts)
+
+    def save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"version": VERSION, "data_root": self.data_root, "datasets": self.datasets},
+                f,
+                indent=1,
+            )
+        os.replace(tmp_path, self.path)
+
+    def _scan(self, dataset: str, directory: str) -> dict:
+        previous = self.datasets.get(dataset, {}).get("files", {})
+        files = {}
+        for item in os.scandir(directory):
+            # staging manifests and half-written files are not inputs
+            if not item.is_file() or item.name.startswith(".") or item.name.endswith(".tmp"):
+                continue
+            relpath = "/".join([*DATASETS[dataset], item.name])
+            files[relpath] = self._entry(dataset, item.path, item.stat(), previous.get(relpath))
+
+        return files
+
+    def _restat(self, dataset: str, previous: dict) -> dict:
+        files = {}
+        for relpath, entry in previous.items():
+            path = self.absolute(*relpath.split("/"))
+            try:
+                files[relpath] = self._entry(dataset, path, os.stat(path), entry)
+            except FileNotFoundError:
+                # removed within the directory mtime's resolution
+                continue
+
+        return files
+
+    def _entry(self, dataset: str, path: str, stat, previous: dict = None) -> dict:
+        if previous is not None and previous["size"] == stat.st_size and previous["mtime_ns"] == stat.st_mtime_ns:
+            return previous
+
+        return {
+            "dataset": dataset,
+            "year": parse_year(os.path.basename(path)),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_hash(path),
+        }
@@ -0,0 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from util.manifest import get_manifest
+
+
+class Partition(NamedTuple):
+    year: int
+    path: str
+    size: int
+
+
+class PartitionedDataset:
+    """
+    A raw dataset stored as one file per year (the WISQARS and QCOR exports,
+    the renamed N-MHSS surveys), its partitions discovered once from the
+    input manifest using the manifest's year rule.
+
+    Selecting by year or year range only looks at this index, so the files
+    of unselected years are never opened.
+
+    Parameters:
+    - dataset: name from util.manifest.DATASETS
+    - suffix: only files ending in this (e.g. ".csv"), case-insensitive
+    """
+
+    def __init__(self, dataset: str, suffix: str = None):
+        self.dataset = dataset
+        self.partitions = {}
+        self.unpartitioned = []
+
+        for entry in get_manifest().entries(dataset):
+            if suffix is not None and not entry["path"].lower().endswith(suffix.lower()):
+                continue
+            if entry["year"] is None:
+                self.unpartitioned.append(entry["relpath"])
+            elif entry["year"] in self.partitions:
+                print(f"Second {dataset} file for {entry['year']}, skipped: {entry['relpath']}")
+            else:
+                self.partitions[entry["year"]] = Partition(entry["year"], entry["path"], entry["size"])
+
+    @property
+    def years(self) -> list:
+        return sorted(self.partitions)
+
+    def select(self, years=None, start: int = None, end: int = None) -> list:
+        """
+        Partitions whose year is in years and between start and end
+        (inclusive), in year order; every bound defaults to no limit.
+        """
+        years = None if years is None else {int(year) for year in years}
+
+        return [
+            self.partitions[year]
+            for year in self.years
+            if (years is None or year in years)
+            and (start is None or year >= start)
+            and (end is None or year <= end)
+        ]
+
+    def read(self, reader, years=None, start: int = None, end: int = None, workers: int = None) -> dict:
+        """
+        Call reader on each selected partition concurrently on a thread pool.
+
+        Parameters:
+        - reader: function taking a Partition
+        - years, start, end: selection, see select
+        - workers: number of reader threads, defaults to one per partition
+          up to 8
+
+        Returns a dict of year -> reader result, in year order.
+        """
+        partitions = self.select(years, start, end)
+        if not partitions:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=workers or min(len(partitions), 8)) as pool:
+            results = list(pool.map(reader, partitions))
+
+        return {partition.year: result for partition, result in zip(partitions, results)}
@@ -0,0 +1,159 @@
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from util.cache import file_hash
+from util.convert import tsv_to_csv_many
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+MANIFEST_NAME = ".staging.json"
+
+# linux/fs.h FICLONE: share the source's extents copy-on-write (btrfs, xfs, ...)
+_FICLONE = 0x40049409
+
+
+def stage_files(pairs, target_dir: str, workers: int = None) -> dict:
+    """
+    Stage raw files into target_dir, redoing only the targets whose source
+    changed since they were last staged.
+
+    Unchanged-content targets are reflinked or hardlinked to the source and
+    only copied when neither is possible; .tsv sources with a .csv target are
+    converted, in parallel. What was staged from what is recorded in
+    target_dir/.staging.json.
+
+    Parameters:
+    - pairs: iterable of (source_path, target_path)
+    - target_dir: str, directory holding the targets and the manifest
+    - workers: number of worker threads/processes
+
+    Returns a dict of target path -> "skipped", "reflinked", "linked",
+    "copied" or "converted". Raises ValueError, before touching any file,
+    if two sources map to the same target.
+    """
+    pairs = list(pairs)
+    sources = {}
+    for source, target in pairs:
+        sources.setdefault(os.path.abspath(target), []).append(source)
+    duplicates = {target: names for target, names in sources.items() if len(names) > 1}
+    if duplicates:
+        raise ValueError(
+            "Several sources map to the same target: "
+            + "; ".join(f"{target} <- {', '.join(names)}" for target, names in sorted(duplicates.items()))
+        )
+
+    manifest = load_manifest(target_dir)
+    actions = {}
+    links = []
+    conversions = []
+
+    for source, target in pairs:
+        if is_staged(manifest, source, target):
+            actions[target] = "skipped"
+        elif _is_conversion(source, target):
+            conversions.append((source, target))
+        else:
+            links.append((source, target))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for (source, target), action in zip(links, pool.map(lambda pair: link_or_copy(*pair), links)):
+            actions[target] = action
+
+    for source, target in conversions:
+        if os.path.exists(target):
+            os.remove(target)
+    tsv_to_csv_many(conversions, workers=workers)
+    for source, target in conversions:
+        actions[target] = "converted"
+
+    for source, target in links + conversions:
+        record(manifest, source, target)
+    save_manifest(target_dir, manifest)
+
+    for action in ("skipped", "reflinked", "linked", "copied", "converted"):
+        count = sum(1 for value in actions.values() if value == action)
+        if count:
+            print(f"{action}: {count}")
+
+    return actions
+
+
+def link_or_copy(source: str, target: str) -> str:
+    """
+    Make target a copy-on-write clone of source, falling back to a hardlink
+    and finally to a full copy.
+    """
+    if os.path.lexists(target):
+        # never write through an old hardlink into the source it shares
+        os.remove(target)
+
+    if fcntl is not None:
+        try:
+            with open(source, "rb") as src, open(target, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            shutil.copystat(source, target)
+            return "reflinked"
+        except OSError:
+            os.remove(target)
+
+    try:
+        os.link(source, target)
+        return "linked"
+    except OSError:
+        shutil.copy2(source, target)
+        return "copied"
+
+
+def is_staged(manifest: dict, source: str, target: str) -> bool:
+    """
+    True if target was staged from source and source's size, mtime and
+    content hash still match what was recorded. The hash is only computed
+    when the size matches but the mtime moved.
+    """
+    entry = manifest.get(target)
+    if entry is None or entry["source"] != source or not os.path.exists(target):
+        return False
+
+    stat = os.stat(source)
+    if stat.st_size != entry["size"]:
+        return False
+    if stat.st_mtime_ns != entry["mtime_ns"] and file_hash(source) != entry["sha256"]:
+        return False
+
+    entry["mtime_ns"] = stat.st_mtime_ns
+
+    return True
+
+
+def record(manifest: dict, source: str, target: str):
+    stat = os.stat(source)
+    manifest[target] = {
+        "source": source,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_hash(source),
+    }
+
+
+def load_manifest(target_dir: str) -> dict:
+    path = os.path.join(target_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(target_dir: str, manifest: dict):
+    path = os.path.join(target_dir, MANIFEST_NAME)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(f"{path}.tmp", path)
+
+
+def _is_conversion(source: str, target: str) -> bool:
+    return source.lower().endswith(".tsv") and target.lower().endswith(".csv")